@@ -7,12 +7,100 @@ Date: 2025-12-22
 Version: 1.2.6
 """
 
+import os
 import sys
+import queue
+import atexit
 import logging
 
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Set, Tuple
+
+
+# 模块级日志记录器（避免每次调用都查询 logging 注册表）
+_LOGGER = logging.getLogger("Koch")
+# 日志格式（所有处理器共用）
+_FORMATTER = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+# 运行环境（导入时确定一次）
+_FROZEN: bool = getattr(sys, 'frozen', False)  # 是否为打包后的exe
+# PyInstaller 解压的临时目录（非打包环境或不存在时为 None）
+_MEIPASS_DIR: Optional[Path] = (
+    Path(sys._MEIPASS) if _FROZEN and hasattr(sys, '_MEIPASS') else None
+)
+
+# 预先生成常用的目录名和文件名（按编号索引，避免运行时重复格式化字符串）
+# 字符音频和课程目录各 41 个，练习文件编号通常也在此范围内
+_LESSON_FOLDERS = tuple(f"Lesson-{n:02d}" for n in range(41))  # Lesson-00 ~ Lesson-40
+_AUDIO_NAMES = tuple(f"koch-{i:03d}.wav" for i in range(41))  # koch-000.wav ~ koch-040.wav
+_TEXT_NAMES = tuple(f"koch-{i:03d}.txt" for i in range(41))  # koch-000.txt ~ koch-040.txt
+
+
+def _lesson_folder(lesson_num: int) -> str:
+    """课程目录名，超出预先生成的范围时按需格式化"""
+    if 0 <= lesson_num < len(_LESSON_FOLDERS):
+        return _LESSON_FOLDERS[lesson_num]
+    return f"Lesson-{lesson_num:02d}"
+
+
+def _audio_name(index: int) -> str:
+    """音频文件名，超出预先生成的范围时按需格式化"""
+    if 0 <= index < len(_AUDIO_NAMES):
+        return _AUDIO_NAMES[index]
+    return f"koch-{index:03d}.wav"
+
+
+def _text_name(index: int) -> str:
+    """文本文件名，超出预先生成的范围时按需格式化"""
+    if 0 <= index < len(_TEXT_NAMES):
+        return _TEXT_NAMES[index]
+    return f"koch-{index:03d}.txt"
+
+
+class _SizeTrackingRotatingFileHandler(RotatingFileHandler):
+    """
+    按累计写入字节数判断轮转的日志文件处理器
+    
+    标准 RotatingFileHandler 每写一条日志都会检查文件状态并 seek 到文件末尾，
+    这里只在打开文件时读取一次文件大小，之后在内存中累加写入的字节数
+    """
+    
+    def __init__(self, *args, **kwargs):
+        self._bytes_written = 0
+        super().__init__(*args, **kwargs)
+    
+    def _open(self):
+        """打开日志文件，并同步一次当前文件大小"""
+        stream = super()._open()
+        stream.seek(0, 2)
+        self._bytes_written = stream.tell()
+        return stream
+    
+    def emit(self, record: logging.LogRecord):
+        """
+        格式化一次日志记录，按需轮转后写入，并按实际写入的内容累加字节数
+        """
+        try:
+            msg = self.format(record) + self.terminator
+            if self.stream is None:  # delay=True 时首次写入才打开文件
+                self.stream = self._open()
+            msg_size = len(msg.encode(self.encoding or "utf-8"))
+            if (self.maxBytes > 0 and self._bytes_written > 0
+                    and self._bytes_written + msg_size > self.maxBytes):
+                self.doRollover()
+                if self.stream is None:  # 轮转后重新打开文件（_open 会重置字节计数）
+                    self.stream = self._open()
+            self.stream.write(msg)
+            self.flush()
+            self._bytes_written += msg_size
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
 
 
 class Config:
@@ -23,12 +111,34 @@ class Config:
     APP_VERSION: str = "1.2.6"
     AUTHOR: str = "Xiaokang HU"
     
+    # 固定的实例属性，不创建 __dict__
+    __slots__ = (
+        '_base_dir', '_resource_dir',
+        '_character_dir', '_character_dir_str', '_character_prefix',
+        '_logo_dir', '_echarts_dir', '_statistics_file',
+        '_lesson_dirs', '_lesson_prefixes', '_logo_paths', '_echarts_paths',
+        '_character_audio_paths', '_lesson_audio_paths', '_lesson_text_paths',
+        '_log_listener',
+    )
+    
     def __init__(self):
         """初始化配置管理器"""
         self._base_dir = None
         self._resource_dir = None
+        self._character_dir = None  # 字符音频目录
+        self._character_dir_str = ""  # 字符音频目录字符串
+        self._character_prefix = ""  # 字符音频目录字符串（以路径分隔符结尾）
         self._logo_dir = None  # Logo 目录
         self._echarts_dir = None  # Echarts 目录
+        self._statistics_file = None  # 统计数据文件
+        self._lesson_dirs: Dict[int, Path] = {}  # 课程目录缓存
+        self._lesson_prefixes: Dict[int, str] = {}  # 课程目录字符串缓存（以路径分隔符结尾）
+        self._logo_paths: Dict[str, Path] = {}  # Logo 路径缓存
+        self._echarts_paths: Dict[str, Path] = {}  # Echarts 模板路径缓存
+        self._character_audio_paths: Dict[int, Path] = {}  # 字符音频路径缓存
+        self._lesson_audio_paths: Dict[Tuple[int, int], Path] = {}  # 课程音频路径缓存
+        self._lesson_text_paths: Dict[Tuple[int, int], Path] = {}  # 课程文本路径缓存
+        self._log_listener = None  # 后台日志监听器
         
         self._init_paths()
         self._init_logging()
@@ -43,46 +153,63 @@ class Config:
         打包后使用固定路径: D:/Program Files (x86)/Koch/
         开发环境使用脚本所在目录
         """
-        if getattr(sys, 'frozen', False):
+        if _FROZEN:
             # 打包后的exe运行环境
             self._base_dir = Path("D:/Program Files (x86)/Koch")
-            
-            # PyInstaller 解压的临时目录
-            if hasattr(sys, '_MEIPASS'):
-                # Logo 从打包的资源中获取
-                self._logo_dir = Path(sys._MEIPASS) / "Logo"
-                # Echarts 从打包的资源中获取
-                self._echarts_dir = Path(sys._MEIPASS) / "Echarts"
-            else:
-                # 回退到基础目录
-                self._logo_dir = self._base_dir / "Logo"
-                self._echarts_dir = self._base_dir / "Echarts"
         else:
             # 开发环境：使用脚本所在目录
             self._base_dir = Path(__file__).parent
-            self._logo_dir = self._base_dir / "Logo"
-            self._echarts_dir = self._base_dir / "Echarts"
+        
+        # Logo 和 Echarts 优先从打包的资源中获取，否则回退到基础目录
+        bundle_dir = _MEIPASS_DIR if _MEIPASS_DIR is not None else self._base_dir
+        self._logo_dir = bundle_dir / "Logo"
+        self._echarts_dir = bundle_dir / "Echarts"
         
         # 确保目录存在
-        self._base_dir.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(self._base_dir, parents=True)
         
         # 资源目录
         self._resource_dir = self._base_dir / "Resource"
-        self._resource_dir.mkdir(exist_ok=True)
+        self._ensure_dir(self._resource_dir)
+        
+        # 字符音频目录（仅在初始化时创建一次）
+        self._character_dir = self._resource_dir / "Character"
+        self._ensure_dir(self._character_dir)
+        self._character_dir_str = os.fspath(self._character_dir)
+        self._character_prefix = os.path.join(self._character_dir_str, "")
+        
+        # 统计数据文件
+        self._statistics_file = self._base_dir / "Statistics.json"
+    
+    @staticmethod
+    def _ensure_dir(path: Path, parents: bool = False) -> None:
+        """
+        确保目录存在
+        
+        目录已存在时（除首次运行外的常见情况）只需一次 stat，不再调用 mkdir
+        
+        Args:
+            path: 目录路径
+            parents: 是否同时创建缺失的上级目录
+        """
+        if not os.path.isdir(path):
+            path.mkdir(parents=parents, exist_ok=True)
     
     def _init_logging(self, level: int = logging.INFO) -> logging.Logger:
         """初始化日志记录器"""
-        logger = logging.getLogger("Koch")
+        logger = _LOGGER
         # 避免重复添加处理器
         if logger.handlers:
             return logger
         logger.setLevel(level)
         # 日志文件处理器（自动轮转，最大10MB，保留3个备份）
-        file_handler = RotatingFileHandler(
+        # delay=True: 直到第一条日志写入时才打开日志文件
+        file_handler = _SizeTrackingRotatingFileHandler(
             filename=self.log_file,
             maxBytes=10 * 1024 * 1024,
             backupCount=3,
-            encoding='utf-8'
+            encoding='utf-8',
+            delay=True
         )
         file_handler.setLevel(level)
 
@@ -90,16 +217,22 @@ class Config:
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.WARNING)
 
-        # 日志格式
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
+        file_handler.setFormatter(_FORMATTER)
+        console_handler.setFormatter(_FORMATTER)
+
+        # 日志记录先放入队列，由后台线程统一写入，避免阻塞调用方（如UI线程）
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setLevel(level)
+        self._log_listener = QueueListener(
+            log_queue, file_handler, console_handler,
+            respect_handler_level=True
         )
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
+        self._log_listener.start()
+        # 程序退出时停止监听器，确保队列中的日志全部写入
+        atexit.register(self._log_listener.stop)
 
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        logger.addHandler(queue_handler)
 
         return logger
     
@@ -118,9 +251,12 @@ class Config:
     @property
     def character_dir(self) -> Path:
         """获取字符音频目录"""
-        path = self._resource_dir / "Character"
-        path.mkdir(exist_ok=True)
-        return path
+        return self._character_dir
+    
+    @property
+    def character_dir_str(self) -> str:
+        """获取字符音频目录的字符串形式（供 open()/wave.open() 等直接使用）"""
+        return self._character_dir_str
     
     @property
     def logo_dir(self) -> Path:
@@ -153,22 +289,42 @@ class Config:
         return self._base_dir / "Koch.log"
     
     def get_lesson_dir(self, lesson_num: int) -> Path:
-        """获取指定课程的目录"""
-        path = self._resource_dir / f"Lesson-{lesson_num:02d}"
-        path.mkdir(exist_ok=True)
+        """获取指定课程的目录（首次访问时创建并缓存）"""
+        path = self._lesson_dirs.get(lesson_num)
+        if path is None:
+            path = self._resource_dir / _lesson_folder(lesson_num)
+            self._ensure_dir(path)
+            self._lesson_dirs[lesson_num] = path
+            self._lesson_prefixes[lesson_num] = os.path.join(path, "")
         return path
     
     def get_character_audio(self, char_index: int) -> Path:
-        """获取字符音频文件路径"""
-        return self.character_dir / f"koch-{char_index:03d}.wav"
+        """获取字符音频文件路径（首次访问时缓存）"""
+        path = self._character_audio_paths.get(char_index)
+        if path is None:
+            path = Path(self._character_prefix + _audio_name(char_index))
+            self._character_audio_paths[char_index] = path
+        return path
     
     def get_lesson_audio(self, lesson_num: int, file_index: int) -> Path:
-        """获取课程音频文件路径"""
-        return self.get_lesson_dir(lesson_num) / f"koch-{file_index:03d}.wav"
+        """获取课程音频文件路径（首次访问时缓存）"""
+        key = (lesson_num, file_index)
+        path = self._lesson_audio_paths.get(key)
+        if path is None:
+            self.get_lesson_dir(lesson_num)  # 确保课程目录已创建
+            path = Path(self._lesson_prefixes[lesson_num] + _audio_name(file_index))
+            self._lesson_audio_paths[key] = path
+        return path
     
     def get_lesson_text(self, lesson_num: int, file_index: int) -> Path:
-        """获取课程文本文件路径"""
-        return self.get_lesson_dir(lesson_num) / f"koch-{file_index:03d}.txt"
+        """获取课程文本文件路径（首次访问时缓存）"""
+        key = (lesson_num, file_index)
+        path = self._lesson_text_paths.get(key)
+        if path is None:
+            self.get_lesson_dir(lesson_num)  # 确保课程目录已创建
+            path = Path(self._lesson_prefixes[lesson_num] + _text_name(file_index))
+            self._lesson_text_paths[key] = path
+        return path
     
     def get_logo_path(self, theme: str = 'light') -> Path:
         """
@@ -182,12 +338,14 @@ class Config:
             - 打包后：从 PyInstaller 临时目录读取
             - 开发环境：从项目 Logo 目录读取
         """
-        logger = logging.getLogger("Koch")
-        logo_path = self._logo_dir / f"logo_{theme}.png"
-        
-        # 检查文件是否存在
-        if not logo_path.exists():
-            logger.warning(f"Logo file not found: {logo_path}")
+        logo_path = self._logo_paths.get(theme)
+        if logo_path is None:
+            logo_path = self._logo_dir / f"logo_{theme}.png"
+            
+            # 仅在首次解析时检查文件是否存在
+            if not logo_path.exists():
+                _LOGGER.warning(f"Logo file not found: {logo_path}")
+            self._logo_paths[theme] = logo_path
         
         return logo_path
     
@@ -203,19 +361,43 @@ class Config:
             - 打包后：从 PyInstaller 临时目录读取
             - 开发环境：从项目 Echarts 目录读取
         """
-        logger = logging.getLogger("Koch")
-        html_path = self._echarts_dir / f"{template_name}.html"
-        if not html_path.exists():
-            logger.warning(f"Echarts HTML file not found: {html_path}")
+        html_path = self._echarts_paths.get(template_name)
+        if html_path is None:
+            html_path = self._echarts_dir / f"{template_name}.html"
+            if not html_path.exists():
+                _LOGGER.warning(f"Echarts HTML file not found: {html_path}")
+            self._echarts_paths[template_name] = html_path
             
         return html_path
     
     def get_statistics_file(self) -> Path:
         """获取统计数据文件路径"""
-        return self.base_dir / "Statistics.json"
+        return self._statistics_file
     
     # ==================== 资源完整性检查 ====================
     
+    @staticmethod
+    def _list_dir_names(directory: Path, want_dirs: bool = False) -> Set[str]:
+        """
+        一次性读取目录下的全部文件名或子目录名
+        
+        使用 DirEntry 自带的文件类型信息判断，不需要对每个条目单独 stat
+        
+        Args:
+            directory: 要扫描的目录
+            want_dirs: True 返回子目录名，False 返回普通文件名
+        
+        Returns:
+            名称集合，目录不存在时返回空集合
+        """
+        try:
+            with os.scandir(directory) as entries:
+                if want_dirs:
+                    return {entry.name for entry in entries if entry.is_dir()}
+                return {entry.name for entry in entries if entry.is_file()}
+        except FileNotFoundError:
+            return set()
+    
     def check_resources(self) -> Dict[str, Any]:
         """
         检查资源完整性
@@ -229,29 +411,48 @@ class Config:
             'complete': True
         }
         
-        # 检查字符音频（41个）
+        # 检查字符音频（41个），整个目录只扫描一次
+        char_names = self._list_dir_names(self._character_dir)
         for i in range(41):
-            if not self.get_character_audio(i).exists():
+            if _AUDIO_NAMES[i] not in char_names:
                 result['character_audio'] = False
                 result['complete'] = False
                 break
         
-        # 检查40个课程
+        # 检查40个课程：先扫描资源目录，缺失的课程目录直接判定为不完整
+        lesson_folders = self._list_dir_names(self._resource_dir, want_dirs=True)
+        required_names = {
+            name
+            for file_num in range(1, 2)
+            for name in (_AUDIO_NAMES[file_num], _TEXT_NAMES[file_num])
+        }
         for lesson in range(1, 41):
-            lesson_complete = True
-            for file_num in range(1, 2):
-                audio = self.get_lesson_audio(lesson, file_num)
-                text = self.get_lesson_text(lesson, file_num)
-                if not audio.exists() or not text.exists():
-                    lesson_complete = False
-                    break
+            folder = _LESSON_FOLDERS[lesson]
+            if folder in lesson_folders:
+                lesson_names = self._list_dir_names(self._resource_dir / folder)
+                if required_names <= lesson_names:
+                    continue
             
-            if not lesson_complete:
-                result['lessons'].append(lesson)
-                result['complete'] = False
+            result['lessons'].append(lesson)
+            result['complete'] = False
         
         return result
 
 
 # ==================== 全局配置实例 ====================
-config = Config()
\ No newline at end of file
+_config: Optional[Config] = None
+
+
+def __getattr__(name: str) -> Any:
+    """
+    延迟创建全局配置实例（PEP 562）
+    
+    首次访问 config 时才创建目录、注册日志处理器，
+    仅导入 Config 类的模块不会触发任何文件系统操作
+    """
+    global _config
+    if name == "config":
+        if _config is None:
+            _config = Config()
+        return _config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -7,16 +7,78 @@ Date: 2025-12-22
 Version: 1.2.6
 """
 
+import sys
+import math
 import random
+import struct
+import multiprocessing
 import numpy as np
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing.shared_memory import SharedMemory
 from pathlib import Path
-from typing import Tuple, Optional, List
-from scipy.io import wavfile
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Tuple, Optional, List, Sequence
 from PySide6.QtCore import QSettings
 
 from Config import config
 
+try:
+    from numba import njit  # 可选依赖：将音频片段复制循环编译为机器码
+except ImportError:
+    njit = None
+
+
+# 完整的摩尔斯电码映射表（Koch方法41个字符），只读且所有生成器共享
+_MORSE_CODE: Mapping[str, str] = MappingProxyType({
+    'K': '-.-',   'M': '--',    'U': '..-',   'R': '.-.',
+    'E': '.',     'S': '...',   'N': '-.',    'A': '.-',
+    'P': '.--.',  'T': '-',     'L': '.-..',  'W': '.--',
+    'I': '..',    '.': '.-.-.-','J': '.---',  'Z': '--..',
+    '=': '-...-', 'F': '..-.',  'O': '---',   'Y': '-.--',
+    ',': '--..--','V': '...-',  'G': '--.',   '5': '.....',
+    '/': '-..-.',  'Q': '--.-', '9': '----.',  '2': '..---',
+    'H': '....',  '3': '...--', '8': '---..',  'B': '-...',
+    '?': '..--..','4': '....-', '7': '--...',  'C': '-.-.',
+    '1': '.----', 'D': '-..',   '6': '-....',  '0': '-----',
+    'X': '-..-',  ' ': ' '
+})
+
+
+def _copy_segments(
+    audio: np.ndarray,
+    table: np.ndarray,
+    starts: np.ndarray,
+    lengths: np.ndarray,
+    order: np.ndarray
+) -> np.ndarray:
+    """
+    按片段编号顺序将片段表中的音频依次复制到输出数组
+    
+    Args:
+        audio: 预先分配的输出数组(长度为所有片段长度之和)
+        table: 所有音频片段首尾相连组成的片段表
+        starts: 每个片段在片段表中的起始位置
+        lengths: 每个片段的长度
+        order: 按播放顺序排列的片段编号
+        
+    Returns:
+        写满数据的输出数组
+    """
+    pos = 0
+    for k in order:
+        start = starts[k]
+        n = lengths[k]
+        audio[pos:pos + n] = table[start:start + n]
+        pos += n
+    return audio
+
+
+if njit is not None:
+    # 打包后的exe无法写入编译缓存，仅在开发环境启用
+    _copy_segments = njit(cache=not getattr(sys, 'frozen', False))(_copy_segments)
+
 
 class MorseCodeGenerator:
     """
@@ -28,6 +90,21 @@ class MorseCodeGenerator:
     - 自动添加淡入淡出效果防止爆音
     """
     
+    # ==================== 常量定义 ====================
+    LEADING_SILENCE_TIME: float = 0.8   # 文本音频前导静音时长(秒)
+    TRAILING_SILENCE_TIME: float = 1.2  # 文本音频结尾静音时长(秒)
+    FADE_TIME: float = 0.005            # 音调淡入淡出时长(秒)
+    AUDIO_DTYPE = np.float32            # 音频采样数据类型(最终输出为16位整数，单精度足够)
+    WAV_WRITE_BUFFER: int = 1 << 20     # WAV文件写入缓冲区大小(字节)
+    WORD_CACHE_SIZE: int = 4096         # 单词编码缓存的最大条目数
+    
+    # 片段表中固定片段的编号
+    SEGMENT_LEADING: int = 0            # 前导静音
+    SEGMENT_TRAILING: int = 1           # 结尾静音
+    SEGMENT_WORD_SPACE: int = 2         # 单词间隔
+    SEGMENT_CHAR_SPACE: int = 3         # 字符间隔
+    SEGMENT_EMPTY: int = 4              # 空片段(映射表外的字符)
+    
     # ==================== 类型注解 - 实例变量 ====================
     char_wpm: int                       # 字符速率(WPM)
     effective_wpm: int                  # 有效速率(WPM)
@@ -39,8 +116,36 @@ class MorseCodeGenerator:
     element_space_time: float           # 点划间隔时长(秒)
     char_space_time: float              # 字符间隔时长(秒)
     word_space_time: float              # 单词间隔时长(秒)
+    tone_peak: float                    # 点划音调峰值(即渲染音频的峰值)
     
-    morse_code: dict                    # 摩尔斯电码映射表
+    morse_code: Mapping[str, str]       # 摩尔斯电码映射表(只读)
+    rng: np.random.Generator            # 练习文本随机数生成器
+    
+    # 波形表与淡入淡出包络
+    _wavetable: np.ndarray              # 整数个周期的正弦波形表
+    _fade_in: np.ndarray                # 淡入包络
+    _fade_out: np.ndarray               # 淡出包络
+    _output_scale: float                # 渲染音频转换为16位整数的缩放系数
+    
+    # 共享的只读静音缓冲区，各静音片段均为它的视图
+    _zero_buffer: np.ndarray
+    
+    # 预先生成的音频片段（共享引用，不可原地修改）
+    _dit_audio: np.ndarray              # dit音调
+    _dah_audio: np.ndarray              # dah音调
+    _element_space: np.ndarray          # 点划间隔静音
+    _char_space: np.ndarray             # 字符间隔静音
+    _word_space: np.ndarray             # 单词间隔静音
+    _leading_silence: np.ndarray        # 前导静音
+    _trailing_silence: np.ndarray       # 结尾静音
+    
+    # 片段表（所有音频片段首尾相连，按编号索引）
+    _segment_table: np.ndarray          # 片段表数据
+    _pcm_segment_table: np.ndarray      # 片段表的16位整数版本(直接用于写出WAV)
+    _segment_starts: np.ndarray         # 各片段起始位置
+    _segment_lengths: np.ndarray        # 各片段长度
+    _segment_ids: Dict[str, Tuple[int, int]]  # 字符 -> (不含间隔, 含字符间隔) 的片段编号
+    _encode_word: Callable[[str], Tuple[int, ...]]  # 带缓存的单词编码函数
     
     def __init__(
         self, 
@@ -62,21 +167,9 @@ class MorseCodeGenerator:
         self.effective_wpm = effective_wpm
         self.tone_freq = tone_freq
         self.sample_rate = sample_rate
+        self.rng = np.random.default_rng()
         
-        # 完整的摩尔斯电码映射表（Koch方法41个字符）
-        self.morse_code = {
-            'K': '-.-',   'M': '--',    'U': '..-',   'R': '.-.',
-            'E': '.',     'S': '...',   'N': '-.',    'A': '.-',
-            'P': '.--.',  'T': '-',     'L': '.-..',  'W': '.--',
-            'I': '..',    '.': '.-.-.-','J': '.---',  'Z': '--..',
-            '=': '-...-', 'F': '..-.',  'O': '---',   'Y': '-.--',
-            ',': '--..--','V': '...-',  'G': '--.',   '5': '.....',
-            '/': '-..-.',  'Q': '--.-', '9': '----.',  '2': '..---',
-            'H': '....',  '3': '...--', '8': '---..',  'B': '-...',
-            '?': '..--..','4': '....-', '7': '--...',  'C': '-.-.',
-            '1': '.----', 'D': '-..',   '6': '-....',  '0': '-----',
-            'X': '-..-',  ' ': ' '
-        }
+        self.morse_code = _MORSE_CODE
         
         # 计算基本时间单位（dit）- 基于字符速率
         # 标准: PARIS为50个dit单位，1分钟能发送char_wpm个PARIS
@@ -109,6 +202,140 @@ class MorseCodeGenerator:
             # 无Farnsworth，使用标准间隔
             self.char_space_time = 3 * self.dit_time
             self.word_space_time = 7 * self.dit_time
+        
+        # 正弦波形表：长度为 sample_rate / gcd(sample_rate, tone_freq)，
+        # 恰好包含整数个周期，按 i % len 取样即可得到相位连续的正弦波
+        table_len = sample_rate // math.gcd(sample_rate, tone_freq)
+        # 相位用float64计算保证精度，原地求正弦后再转换为输出精度
+        phase = np.arange(table_len, dtype=np.float64)
+        phase *= 2 * np.pi * tone_freq / sample_rate
+        np.sin(phase, out=phase)
+        self._wavetable = phase.astype(self.AUDIO_DTYPE)
+        
+        # 淡入淡出包络
+        fade_samples = int(sample_rate * self.FADE_TIME)
+        self._fade_in = np.linspace(0, 1, fade_samples, dtype=self.AUDIO_DTYPE)
+        self._fade_out = self._fade_in[::-1]
+        
+        # 共享静音缓冲区及各静音片段
+        self._build_silences()
+        
+        # 预先生成所有音频片段
+        # 点划和间隔的时长在初始化后固定，只需生成一次，之后直接复用
+        # 淡入淡出包络在生成时已作用于点划音调，缓存后冻结为只读，防止被调用方原地修改
+        self._dit_audio = self.generate_tone(self.dit_time)
+        self._dah_audio = self.generate_tone(self.dah_time)
+        self._dit_audio.setflags(write=False)
+        self._dah_audio.setflags(write=False)
+        # 渲染出的音频全部由点划音调复制而来，其峰值在初始化时即可确定
+        self.tone_peak = max(
+            float(np.abs(self._dit_audio).max(initial=0.0)),
+            float(np.abs(self._dah_audio).max(initial=0.0))
+        )
+        self._output_scale = 32767.0 / self.tone_peak if self.tone_peak > 0 else 0.0
+        self._build_segment_table()
+        
+        # 练习文本由大量5字符短组构成，按内容缓存各组的编码结果
+        self._encode_word = lru_cache(maxsize=self.WORD_CACHE_SIZE)(self._encode_word_uncached)
+    
+    def _build_silences(self) -> None:
+        """
+        创建共享静音缓冲区和各静音片段
+        
+        缓冲区长度覆盖所有固定静音时长，静音片段直接取它的切片视图
+        """
+        max_silence_samples = int(self.sample_rate * max(
+            self.word_space_time, self.LEADING_SILENCE_TIME, self.TRAILING_SILENCE_TIME
+        ))
+        self._zero_buffer = np.zeros(max_silence_samples, dtype=self.AUDIO_DTYPE)
+        self._zero_buffer.setflags(write=False)
+        
+        self._element_space = self.generate_silence(self.element_space_time)
+        self._char_space = self.generate_silence(self.char_space_time)
+        self._word_space = self.generate_silence(self.word_space_time)
+        self._leading_silence = self.generate_silence(self.LEADING_SILENCE_TIME)
+        self._trailing_silence = self.generate_silence(self.TRAILING_SILENCE_TIME)
+    
+    def _build_segment_table(self) -> None:
+        """
+        将所有音频片段合并为一个连续的片段表
+        
+        文本渲染时只需把文本编码为片段编号序列，再按编号从片段表复制数据；
+        每个字符占两个片段：字符音频本身，以及末尾追加字符间隔的版本
+        """
+        segments = [
+            self._leading_silence,      # SEGMENT_LEADING
+            self._trailing_silence,     # SEGMENT_TRAILING
+            self._word_space,           # SEGMENT_WORD_SPACE
+            self._char_space,           # SEGMENT_CHAR_SPACE
+            self.generate_silence(0),   # SEGMENT_EMPTY
+        ]
+        self._segment_ids = {}
+        for char, morse in self.morse_code.items():
+            audio = self._render_char_audio(morse)
+            self._segment_ids[char] = (len(segments), len(segments) + 1)
+            segments.append(audio)
+            segments.append(np.concatenate([audio, self._char_space]))
+        
+        self._segment_lengths = np.array([len(segment) for segment in segments], dtype=np.int64)
+        self._segment_starts = np.zeros_like(self._segment_lengths)
+        np.cumsum(self._segment_lengths[:-1], out=self._segment_starts[1:])
+        self._segment_table = np.concatenate(segments)
+        # 预先量化为16位整数，练习文件直接按整数片段渲染，无需逐文件转换
+        self._pcm_segment_table = self._to_pcm16(self._segment_table)
+    
+    def pcm_segment_table_nbytes(self) -> int:
+        """返回16位整数片段表的字节数"""
+        return self._pcm_segment_table.nbytes
+    
+    def export_pcm_segment_table(self, buffer) -> None:
+        """
+        将16位整数片段表复制到外部缓冲区(如多进程共享内存)
+        
+        Args:
+            buffer: 长度不小于 pcm_segment_table_nbytes() 的可写缓冲区
+        """
+        pcm_table = np.ndarray(self._pcm_segment_table.shape, dtype='<i2', buffer=buffer)
+        pcm_table[:] = self._pcm_segment_table
+    
+    def attach_pcm_segment_table(self, buffer) -> None:
+        """
+        改用外部缓冲区(如多进程共享内存)中的16位整数片段表
+        
+        缓冲区内容须由相同参数的生成器通过 export_pcm_segment_table 写入，
+        多个子进程引用同一份片段表，无需各自持有副本；
+        子进程只通过 text_to_pcm16 渲染练习文件，不需要浮点片段表
+        
+        Args:
+            buffer: 存放片段表数据的缓冲区
+        """
+        total_samples = int(self._segment_lengths.sum())
+        pcm_table = np.ndarray((total_samples,), dtype='<i2', buffer=buffer)
+        pcm_table.setflags(write=False)
+        self._pcm_segment_table = pcm_table
+    
+    def __getstate__(self) -> dict:
+        """
+        序列化时省略片段表、静音片段和只读映射表
+        
+        传给子进程后须调用 attach_pcm_segment_table 挂接共享的16位整数片段表，
+        浮点片段表不会传给子进程
+        """
+        state = self.__dict__.copy()
+        for name in (
+            'morse_code', '_segment_table', '_pcm_segment_table', '_encode_word',
+            '_zero_buffer', '_element_space', '_char_space', '_word_space',
+            '_leading_silence', '_trailing_silence'
+        ):
+            state.pop(name, None)
+        return state
+    
+    def __setstate__(self, state: dict) -> None:
+        """反序列化时恢复状态，重新引用共享的映射表，并重建静音片段和单词编码缓存"""
+        self.__dict__.update(state)
+        self.morse_code = _MORSE_CODE
+        self._build_silences()
+        self._encode_word = lru_cache(maxsize=self.WORD_CACHE_SIZE)(self._encode_word_uncached)
     
     # ==================== 音频生成基础方法 ====================
     
@@ -116,7 +343,7 @@ class MorseCodeGenerator:
         """
         生成指定时长的音调
         
-        使用正弦波生成音频，并添加5ms的淡入淡出效果防止爆音
+        从预先计算的正弦波形表取样生成音频，并添加5ms的淡入淡出效果防止爆音
         
         Args:
             duration: 音调时长(秒)
@@ -124,19 +351,17 @@ class MorseCodeGenerator:
         Returns:
             音频数据的numpy数组
         """
-        # 生成时间轴
-        t = np.linspace(0, duration, int(self.sample_rate * duration), False)
+        num_samples = int(self.sample_rate * duration)
         
-        # 淡入淡出参数
-        fade_samples = int(self.sample_rate * 0.005)  # 5ms淡入淡出
-        
-        # 生成正弦波
-        tone = np.sin(2 * np.pi * self.tone_freq * t)
+        # 从波形表取样生成正弦波（不再逐点计算 sin）
+        indices = np.arange(num_samples) % len(self._wavetable)
+        tone = self._wavetable[indices]
         
         # 应用淡入淡出效果
+        fade_samples = len(self._fade_in)
         if len(tone) > 2 * fade_samples:
-            tone[:fade_samples] *= np.linspace(0, 1, fade_samples)
-            tone[-fade_samples:] *= np.linspace(1, 0, fade_samples)
+            tone[:fade_samples] *= self._fade_in
+            tone[-fade_samples:] *= self._fade_out
         
         return tone
     
@@ -148,40 +373,76 @@ class MorseCodeGenerator:
             duration: 静音时长(秒)
             
         Returns:
-            静音数据的numpy数组
+            静音数据的numpy数组；不超过共享缓冲区长度时返回其只读视图，不分配新内存
         """
-        return np.zeros(int(self.sample_rate * duration))
+        num_samples = int(self.sample_rate * duration)
+        if num_samples <= len(self._zero_buffer):
+            return self._zero_buffer[:num_samples]
+        return np.zeros(num_samples, dtype=self.AUDIO_DTYPE)
     
     # ==================== 摩尔斯电码转换方法 ====================
     
+    def _render_char_audio(self, morse: str) -> np.ndarray:
+        """
+        将摩尔斯码拼接为音频（仅在初始化时调用）
+        
+        Args:
+            morse: 摩尔斯码字符串，如 '-.-'
+            
+        Returns:
+            音频数据的numpy数组
+        """
+        # 点划符号直接映射为预先生成的音调，点划之间插入间隔
+        symbol_audio = {'.': self._dit_audio, '-': self._dah_audio}
+        tones = [symbol_audio[symbol] for symbol in morse if symbol in symbol_audio]
+        if not tones:
+            return self.generate_silence(0)
+        
+        parts: List[np.ndarray] = [tones[0]]
+        for tone in tones[1:]:
+            parts.append(self._element_space)
+            parts.append(tone)
+        return np.concatenate(parts)
+    
     def char_to_morse_audio(self, char: str) -> np.ndarray:
         """
         将单个字符转换为摩尔斯电码音频
         
+        返回浮点片段表中该字符片段的只读视图，不复制数据
+        
         Args:
             char: 要转换的字符(大写字母、数字或符号)
             
         Returns:
             音频数据的numpy数组，如果字符不在映射表中则返回空数组
         """
-        if char not in self.morse_code:
-            return np.array([])
-        
-        morse = self.morse_code[char]
-        audio = np.array([])
+        segment_ids = self._segment_ids.get(char)
+        if segment_ids is None:
+            return self.generate_silence(0)
+        start = self._segment_starts[segment_ids[0]]
+        audio = self._segment_table[start:start + self._segment_lengths[segment_ids[0]]]
+        audio.setflags(write=False)
+        return audio
+    
+    def _encode_word_uncached(self, word: str) -> Tuple[int, ...]:
+        """
+        将单个单词(不含空格)编码为片段编号序列
         
-        # 遍历摩尔斯码的每个点划
-        for i, symbol in enumerate(morse):
-            if symbol == '.':  # dit
-                audio = np.append(audio, self.generate_tone(self.dit_time))
-            elif symbol == '-':  # dah
-                audio = np.append(audio, self.generate_tone(self.dah_time))
+        Args:
+            word: 要编码的单词
             
-            # 添加点划间隔（最后一个元素后不添加）
-            if i < len(morse) - 1:
-                audio = np.append(audio, self.generate_silence(self.element_space_time))
-        
-        return audio
+        Returns:
+            片段编号元组
+        """
+        if not word:
+            return ()
+        
+        segment_ids = self._segment_ids
+        unknown_ids = (self.SEGMENT_EMPTY, self.SEGMENT_CHAR_SPACE)
+        # 后面紧跟其他字符时使用含字符间隔的片段，单词最后一个字符不添加字符间隔
+        order = [segment_ids.get(char, unknown_ids)[1] for char in word[:-1]]
+        order.append(segment_ids.get(word[-1], unknown_ids)[0])
+        return tuple(order)
     
     def text_to_morse_audio(self, text: str) -> np.ndarray:
         """
@@ -195,23 +456,49 @@ class MorseCodeGenerator:
         Returns:
             完整的音频数据numpy数组
         """
-        # 初始化音频，添加0.8秒前导静音
-        audio = self.generate_silence(0.8)
+        return self._render_segments(text, self._segment_table)
+    
+    def text_to_pcm16(self, text: str) -> np.ndarray:
+        """
+        将文本直接渲染为16位整数PCM采样(已按点划音调峰值归一化)
         
-        for i, char in enumerate(text):
-            if char == ' ':  # 空格代表单词间隔
-                audio = np.append(audio, self.generate_silence(self.word_space_time))
-            else:
-                # 添加字符音频
-                audio = np.append(audio, self.char_to_morse_audio(char))
-                
-                # 添加字符间隔（最后一个字符或下一个是空格则不添加）
-                if i < len(text) - 1 and text[i + 1] != ' ':
-                    audio = np.append(audio, self.generate_silence(self.char_space_time))
+        结果与 text_to_morse_audio 的输出经 save_audio 归一化后的采样一致
         
-        # 添加1.2秒结尾静音
-        audio = np.append(audio, self.generate_silence(1.2))
-        return audio
+        Args:
+            text: 要转换的文本(支持字母、数字、符号和空格)
+            
+        Returns:
+            小端16位整数采样数组
+        """
+        return self._render_segments(text, self._pcm_segment_table)
+    
+    def _render_segments(self, text: str, table: np.ndarray) -> np.ndarray:
+        """
+        将文本编码为片段编号序列，并从指定片段表复制出完整音频
+        
+        Args:
+            text: 要转换的文本
+            table: 浮点或16位整数片段表
+            
+        Returns:
+            与片段表类型相同的音频数组
+        """
+        # 将文本编码为片段编号序列，首尾为0.8秒前导静音和1.2秒结尾静音
+        # 空格代表单词间隔，各单词的编码结果按内容缓存复用
+        order = [self.SEGMENT_LEADING]
+        for i, word in enumerate(text.split(' ')):
+            if i:
+                order.append(self.SEGMENT_WORD_SPACE)
+            order.extend(self._encode_word(word))
+        order.append(self.SEGMENT_TRAILING)
+        
+        # 一次性分配输出数组，再按顺序从片段表复制
+        order_array = np.array(order, dtype=np.int64)
+        total_samples = int(self._segment_lengths[order_array].sum())
+        audio = np.empty(total_samples, dtype=table.dtype)
+        return _copy_segments(
+            audio, table, self._segment_starts, self._segment_lengths, order_array
+        )
     
     # ==================== 练习内容生成方法 ====================
     
@@ -238,7 +525,7 @@ class MorseCodeGenerator:
         self, 
         char_set: str, 
         num_chars: int = 50, 
-        weights: Optional[List[float]] = None
+        weights: Optional[Sequence[float]] = None
     ) -> Tuple[np.ndarray, str]:
         """
         生成指定字符集的随机组合(用于综合练习)
@@ -253,28 +540,45 @@ class MorseCodeGenerator:
         Returns:
             (音频数据, 文本内容)的元组
         """
-        text = ""
-        chars_list = list(char_set)
+        text = self._generate_pattern_text(char_set, weights)
+        audio = self.text_to_morse_audio(text)
+        return audio, text
+    
+    def _generate_pattern_text(
+        self, 
+        char_set: str, 
+        weights: Optional[Sequence[float]] = None
+    ) -> str:
+        """
+        随机抽取练习文本(10组，每组5个字符，组间用空格分隔)
         
-        # 生成10组，每组5个字符
-        for i in range(10):
-            if weights:
-                # 使用加权随机选择
-                group = ''.join(random.choices(chars_list, weights=weights, k=5))
-            else:
-                # 使用均匀分布
-                group = ''.join(random.choice(chars_list) for _ in range(5))
+        Args:
+            char_set: 可用字符集合(字符串形式)
+            weights: 字符权重列表(可选，用于控制出现频率)
             
-            text += group
-            if i < 9:  # 组间添加空格
-                text += ' '
+        Returns:
+            练习文本
+        """
+        chars = np.array(list(char_set))
         
-        audio = self.text_to_morse_audio(text)
-        return audio, text
+        # 字符权重归一化为概率(None表示均匀分布)
+        probabilities = None
+        if weights is not None:
+            probabilities = np.asarray(weights, dtype=np.float64)
+            probabilities = probabilities / probabilities.sum()
+        
+        # 一次性抽取10组、每组5个字符，组间用空格分隔
+        groups = self.rng.choice(chars, size=(10, 5), p=probabilities)
+        return ' '.join(''.join(group) for group in groups)
     
     # ==================== 文件保存方法 ====================
     
-    def save_audio(self, audio: np.ndarray, filename: str) -> None:
+    def save_audio(
+        self, 
+        audio: np.ndarray, 
+        filename: str, 
+        peak: Optional[float] = None
+    ) -> None:
         """
         保存音频到WAV文件
         
@@ -283,14 +587,62 @@ class MorseCodeGenerator:
         Args:
             audio: 音频数据numpy数组
             filename: 输出文件路径
+            peak: 音频峰值(可选，已知时跳过对整段音频的峰值扫描)
         """
         if len(audio) == 0:
             print(f"⚠ 警告: 音频为空，跳过保存 {filename}")
             return
         
         # 归一化到16位整数范围
-        audio_normalized = np.int16(audio / np.max(np.abs(audio)) * 32767)
-        wavfile.write(filename, self.sample_rate, audio_normalized)
+        # 峰值由 max/min 直接得到（不生成 np.abs 临时数组），缩放系数合并为一次乘法
+        if peak is None:
+            peak = max(float(audio.max()), -float(audio.min()))
+        scale = 32767.0 / peak if peak > 0 else 0.0
+        self.save_pcm16(self._to_pcm16(audio, scale), filename)
+    
+    def save_pcm16(self, samples: np.ndarray, filename: str) -> None:
+        """
+        保存16位整数采样到WAV文件(单声道16位PCM)
+        
+        采样按原值写出，不做归一化；44字节文件头和采样数据分两次写入，采样数据直接从数组内存写出
+        
+        Args:
+            samples: 小端16位整数采样数据(如 text_to_pcm16 的结果)
+            filename: 输出文件路径
+        """
+        # 内存视图直接写出要求数据连续(新分配的数组不会复制)
+        samples = np.ascontiguousarray(samples)
+        data_size = samples.nbytes
+        header = struct.pack(
+            '<4sI4s4sIHHIIHH4sI',
+            b'RIFF', 36 + data_size, b'WAVE',
+            b'fmt ', 16, 1, 1,                      # PCM格式，单声道
+            self.sample_rate, self.sample_rate * 2,  # 采样率，每秒字节数
+            2, 16,                                   # 块对齐，位深
+            b'data', data_size
+        )
+        with open(filename, 'wb', buffering=self.WAV_WRITE_BUFFER) as f:
+            f.write(header)
+            # 通过内存视图写出，不经 tobytes() 复制整段采样数据
+            f.write(samples.data)
+    
+    def _to_pcm16(self, audio: np.ndarray, scale: Optional[float] = None) -> np.ndarray:
+        """
+        按缩放系数将浮点音频转换为16位整数采样
+        
+        Args:
+            audio: 音频数据numpy数组
+            scale: 缩放系数(默认按点划音调峰值归一化)
+            
+        Returns:
+            小端16位整数采样数组
+        """
+        if scale is None:
+            scale = self._output_scale
+        # 乘法结果直接写入16位整数数组，不生成浮点临时数组
+        samples = np.empty(len(audio), dtype='<i2')
+        np.multiply(audio, scale, out=samples, dtype=self.AUDIO_DTYPE, casting='unsafe')
+        return samples
     
     @staticmethod
     def save_text(text: str, filename: str) -> None:
@@ -318,12 +670,21 @@ class KochMethodTrainer:
     # Koch方法推荐的字符学习序列(共41个字符)
     KOCH_SEQUENCE: str = "KMURESNAPTLWI.JZ=FOY,VG5/Q92H38B?47C1D60X"
     
+    # 各频率模式下新字符的权重倍数
+    NEW_CHAR_WEIGHTS: Dict[str, float] = {
+        'new_char_focus': 2.0,
+        'gradual': 1.5
+    }
+    
     # ==================== 类型注解 - 实例变量 ====================
     char_wpm: int                       # 字符速率
     effective_wpm: int                  # 有效速率
     tone_freq: int                      # 音调频率
     frequency_mode: str                 # 频率控制模式
     generator: MorseCodeGenerator       # 音频生成器实例
+    _morse_by_idx: List[str]            # 与KOCH_SEQUENCE对齐的摩尔斯码列表
+    _full_weights: Optional[np.ndarray] # 完整字符序列的权重(None表示均匀分布)
+    _weights_by_lesson: List[Optional[np.ndarray]]  # 按课程编号索引的字符权重
     
     def __init__(
         self, 
@@ -346,9 +707,82 @@ class KochMethodTrainer:
         self.tone_freq = tone_freq
         self.frequency_mode = frequency_mode
         self.generator = MorseCodeGenerator(char_wpm, effective_wpm, tone_freq)
+        
+        # 按课程顺序预先查好每个字符的摩尔斯码
+        morse_code = self.generator.morse_code
+        self._morse_by_idx = [morse_code[char] for char in self.KOCH_SEQUENCE]
+        
+        # 预先计算完整字符序列的权重，各课程直接切片使用
+        self._full_weights = self._build_full_weights(frequency_mode)
+        self._weights_by_lesson = [
+            self._build_lesson_weights(lesson_num) for lesson_num in range(41)
+        ]
     
     # ==================== 频率控制方法 ====================
     
+    def _build_full_weights(
+        self, 
+        mode: str, 
+        morse_list: Optional[Sequence[str]] = None
+    ) -> Optional[np.ndarray]:
+        """
+        计算完整Koch字符序列的基础权重
+        
+        Args:
+            mode: 频率模式
+                - 'uniform': 均匀分布
+                - 'new_char_focus': 新字符2倍权重
+                - 'gradual': 新字符1.5倍权重
+                - 'difficulty': 根据摩尔斯码长度加权
+            morse_list: 各字符的摩尔斯码(默认为完整Koch字符序列)
+            
+        Returns:
+            与 morse_list 等长的权重数组，None表示均匀分布
+        """
+        if morse_list is None:
+            morse_list = self._morse_by_idx
+        if mode == 'difficulty':
+            # 摩尔斯码越长越难，权重越高
+            return np.array([1.0 + len(morse) * 0.15 for morse in morse_list])
+        if mode in self.NEW_CHAR_WEIGHTS:
+            # 新字符的权重在切片时设置
+            return np.ones(len(morse_list))
+        return None
+    
+    def _build_lesson_weights(self, lesson_num: int) -> Optional[np.ndarray]:
+        """
+        从完整权重数组切片计算指定课程的字符权重
+        
+        new_char_focus 模式下新字符为2倍权重，gradual 模式下为1.5倍，其他字符为1倍
+        
+        Args:
+            lesson_num: 课程编号(0-40)
+            
+        Returns:
+            只读权重数组，None表示均匀分布
+        """
+        if self._full_weights is None:
+            return None
+        
+        weights = self._full_weights[:lesson_num + 1].copy()
+        new_char_weight = self.NEW_CHAR_WEIGHTS.get(self.frequency_mode)
+        if new_char_weight is not None:
+            weights[-1] = new_char_weight
+        weights.setflags(write=False)
+        return weights
+    
+    def get_lesson_weights(self, lesson_num: int) -> Optional[np.ndarray]:
+        """
+        获取指定课程的字符权重(初始化时已为所有课程预先计算)
+        
+        Args:
+            lesson_num: 课程编号(1-40)
+            
+        Returns:
+            只读权重数组，None表示均匀分布
+        """
+        return self._weights_by_lesson[lesson_num]
+    
     def get_character_weights(
         self, 
         char_set: str, 
@@ -369,31 +803,19 @@ class KochMethodTrainer:
             权重列表，None表示均匀分布
         """
         n = len(char_set)
-        
-        if mode == 'uniform':
-            return None  # None表示均匀分布
-        
-        elif mode == 'new_char_focus':
-            # 新字符权重2倍，其他字符权重1倍
-            weights = [1.0] * (n - 1) + [2.0]
-            return weights
-        
-        elif mode == 'gradual':
-            # 渐进式：新字符1.5倍
-            weights = [1.0] * (n - 1) + [1.5]
-            return weights
-        
-        elif mode == 'difficulty':
-            # 根据摩尔斯码长度设置权重(越长越难，权重越高)
-            morse_code = self.generator.morse_code
-            weights = []
-            for char in char_set:
-                morse = morse_code.get(char, '.')
-                weight = 1.0 + len(morse) * 0.15
-                weights.append(weight)
-            return weights
-        
-        return None
+        # 课程字符集且模式与训练器一致时，直接使用预先计算的课程权重
+        if mode == self.frequency_mode and n > 0 and self.KOCH_SEQUENCE.startswith(char_set):
+            weights = self.get_lesson_weights(n - 1)
+            return None if weights is None else weights.tolist()
+        
+        morse_code = self.generator.morse_code
+        weights = self._build_full_weights(mode, [morse_code.get(char, '.') for char in char_set])
+        if weights is None:
+            return None
+        new_char_weight = self.NEW_CHAR_WEIGHTS.get(mode)
+        if new_char_weight is not None and n > 0:
+            weights[-1] = new_char_weight
+        return weights.tolist()
     
     # ==================== 内容生成方法 ====================
     
@@ -423,18 +845,16 @@ class KochMethodTrainer:
         
         # 生成41个字符的音频(koch-000到koch-040)
         for idx, char in enumerate(self.KOCH_SEQUENCE):
-            # 生成音频
-            audio, text = self.generator.generate_single_character_pattern(char, count=15)
-            
             # 文件名(只生成音频)
             base_name = f"koch-{idx:03d}"
             audio_file = char_dir / f"{base_name}.wav"
             
-            # 保存音频文件
-            self.generator.save_audio(audio, str(audio_file))
+            # 直接渲染为16位整数采样并保存
+            samples = self.generator.text_to_pcm16(char * 15)
+            self.generator.save_pcm16(samples, str(audio_file))
             
             # 获取摩尔斯码
-            morse = self.generator.morse_code.get(char, '?')
+            morse = self._morse_by_idx[idx]
             
             print(f"✓ {base_name}.wav: '{char}' ({morse}) - 15次重复")
         
@@ -481,41 +901,72 @@ class KochMethodTrainer:
         print(f"  每文件字符数: 50 (10组 × 5字符/组)")
         print(f"\n{'='*70}\n")
         
-        # 生成40个课程
-        for lesson_num in range(1, 41):
-            # 获取当前课程的字符集(前lesson_num+1个字符)
-            char_set = self.KOCH_SEQUENCE[:lesson_num + 1]
-            lesson_dir = config.get_lesson_dir(lesson_num)
-            lesson_dir.mkdir(exist_ok=True)
-            
-            # 获取字符权重
-            weights = self.get_character_weights(char_set, self.frequency_mode)
-            
-            print(f"生成 Lesson-{lesson_num:02d}  字符集: {char_set}")
-            if weights and lesson_num <= 5:  # 只显示前5节课的权重
-                weight_str = ', '.join([f"{c}:{w:.1f}" for c, w in zip(char_set, weights)])
-                print(f"  权重: {weight_str}")
-            
-            # 生成指定数量的练习文件
-            for file_num in range(1, files_per_lesson + 1):
-                audio, text = self.generator.generate_pattern(
-                    char_set, num_chars=50, weights=weights
-                )
-                
-                base_name = f"koch-{file_num:03d}"
-                audio_file = lesson_dir / f"{base_name}.wav"
-                text_file = lesson_dir / f"{base_name}.txt"
-                
-                self.generator.save_audio(audio, str(audio_file))
-                self.generator.save_text(text, str(text_file))
-            
-            print(f"  ✓ 已生成 {files_per_lesson} 个练习文件")
+        # 16位整数片段表放入共享内存，所有子进程直接引用同一份数据
+        shared_table = SharedMemory(create=True, size=self.generator.pcm_segment_table_nbytes())
+        try:
+            self.generator.export_pcm_segment_table(shared_table.buf)
+            self._run_lesson_workers(shared_table.name, files_per_lesson)
+        finally:
+            shared_table.close()
+            shared_table.unlink()
         
         print(f"\n{'='*70}")
         print(f"✓ 所有课程生成完成！")
         print(f"✓ 输出目录: {base_path.absolute()}")
         print(f"{'='*70}\n")
     
+    def _run_lesson_workers(self, shared_table_name: str, files_per_lesson: int) -> None:
+        """
+        在多个子进程中并行生成所有课程的练习文件
+        
+        Args:
+            shared_table_name: 存放16位整数片段表的共享内存名称
+            files_per_lesson: 每课生成的练习文件数
+        """
+        # 生成40个课程
+        # 每个练习文件相互独立，分发到多个进程并行生成
+        # 进程数由标准库决定(按 CPU 核心数，Windows 下不超过61)
+        with ProcessPoolExecutor(
+            initializer=_init_lesson_worker,
+            initargs=(self.generator, shared_table_name)
+        ) as executor:
+            # 先提交所有课程的练习文件任务
+            lesson_tasks = []
+            for lesson_num in range(1, 41):
+                # 获取当前课程的字符集(前lesson_num+1个字符)
+                char_set = self.KOCH_SEQUENCE[:lesson_num + 1]
+                lesson_dir = config.get_lesson_dir(lesson_num)
+                
+                # 获取字符权重(从预先计算的权重数组切片)
+                weights = self.get_lesson_weights(lesson_num)
+                
+                # 生成指定数量的练习文件（每个文件使用独立的随机种子）
+                futures = []
+                for file_num in range(1, files_per_lesson + 1):
+                    base_name = f"koch-{file_num:03d}"
+                    futures.append(executor.submit(
+                        _generate_lesson_file,
+                        char_set,
+                        weights,
+                        random.getrandbits(64),
+                        str(lesson_dir / f"{base_name}.wav"),
+                        str(lesson_dir / f"{base_name}.txt")
+                    ))
+                lesson_tasks.append((lesson_num, char_set, weights, futures))
+            
+            # 按课程顺序等待完成，每课的进度信息汇总后一次输出
+            for lesson_num, char_set, weights, futures in lesson_tasks:
+                lines = [f"生成 Lesson-{lesson_num:02d}  字符集: {char_set}"]
+                if weights is not None and lesson_num <= 5:  # 只显示前5节课的权重
+                    weight_str = ', '.join([f"{c}:{w:.1f}" for c, w in zip(char_set, weights)])
+                    lines.append(f"  权重: {weight_str}")
+                
+                for future in futures:
+                    future.result()
+                
+                lines.append(f"  ✓ 已生成 {files_per_lesson} 个练习文件")
+                print('\n'.join(lines))
+    
     def create_all(
         self, 
         output_dir: str = 'Resource', 
@@ -657,6 +1108,53 @@ class KochMethodTrainer:
         print(f"\n{'='*70}\n")
 
 
+# ==================== 多进程生成 ====================
+
+# 子进程中的音频生成器（由 _init_lesson_worker 在每个进程中创建一次）
+_worker_generator: Optional[MorseCodeGenerator] = None
+# 子进程打开的片段表共享内存（需在进程存活期间保持引用）
+_worker_shared_table: Optional[SharedMemory] = None
+
+
+def _init_lesson_worker(generator: MorseCodeGenerator, shared_table_name: str) -> None:
+    """
+    子进程初始化函数
+    
+    直接使用主进程中已生成的音频片段，子进程无需重新生成
+    
+    Args:
+        generator: 主进程的音频生成器(不含片段表)
+        shared_table_name: 存放16位整数片段表的共享内存名称
+    """
+    global _worker_generator, _worker_shared_table
+    _worker_generator = generator
+    _worker_shared_table = SharedMemory(name=shared_table_name)
+    _worker_generator.attach_pcm_segment_table(_worker_shared_table.buf)
+
+
+def _generate_lesson_file(
+    char_set: str,
+    weights: Optional[np.ndarray],
+    seed: int,
+    audio_file: str,
+    text_file: str
+) -> None:
+    """
+    在子进程中生成并保存一个练习文件
+    
+    Args:
+        char_set: 可用字符集合
+        weights: 字符权重列表(可选)
+        seed: 随机种子
+        audio_file: 音频输出路径
+        text_file: 文本输出路径
+    """
+    _worker_generator.rng = np.random.default_rng(seed)
+    text = _worker_generator._generate_pattern_text(char_set, weights)
+    _worker_generator.save_pcm16(_worker_generator.text_to_pcm16(text), audio_file)
+    _worker_generator.save_text(text, text_file)
+
+
 def main():
     """主函数：交互式创建训练材料"""
     
@@ -719,4 +1217,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包为exe后，多进程子进程需要此调用才能正常启动
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -7,33 +7,137 @@ Date: 2025-12-22
 Version: 1.2.6
 """
 
+import os
 import sys
-import wave
+import struct
 import logging
 import numpy as np
-import pyqtgraph as pg
 
-from ctypes import windll, byref, sizeof, c_int
-from typing import Optional, Dict, List
+from ctypes import windll, byref, sizeof, c_int, c_long, c_uint, c_void_p, WINFUNCTYPE
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Dict, Tuple
 from datetime import datetime
 
-from PySide6.QtCore import Qt, QUrl, QSettings, QTimer, QSize, QSignalBlocker
-from PySide6.QtGui import QShortcut, QKeySequence, QIcon, QFont, QColor
+from PySide6.QtCore import Qt, QUrl, QSettings, QTimer, QSize, QSignalBlocker, QThreadPool, Signal
+from PySide6.QtGui import QShortcut, QKeySequence, QIcon, QFont, QColor, QTextCursor
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput, QMediaDevices
 from PySide6.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QMessageBox
 
 from qfluentwidgets import (
     BodyLabel, StrongBodyLabel, ComboBox, Slider, ToolButton, PushButton,
-    TextEdit, setTheme, setThemeColor, Theme, SwitchButton, FluentIcon
+    PlainTextEdit, setTheme, setThemeColor, Theme, SwitchButton, FluentIcon
 )
 
 from Config import config
 from Statistics import stats_manager
 
+if TYPE_CHECKING:
+    # pyqtgraph 仅在首次启用波形图时导入
+    import pyqtgraph as pg
+
+# 可选依赖：将音频块振幅统计编译为单次遍历的机器码
+# 打包后的exe无法写入编译缓存，每次启动都要重新编译，得不偿失，因此仅在开发环境启用
+njit = None
+if not getattr(sys, 'frozen', False):
+    try:
+        from numba import njit
+    except ImportError:
+        pass
+
+
+# DwmSetWindowAttribute 函数指针（模块加载时解析一次并声明参数类型，之后直接调用）
+# 返回值按普通整数处理，调用失败时不抛出异常（如 Windows 10 不支持标题栏颜色属性）
+try:
+    _DWM_SET_WINDOW_ATTRIBUTE = WINFUNCTYPE(c_long, c_void_p, c_uint, c_void_p, c_uint)(
+        ("DwmSetWindowAttribute", windll.dwmapi)
+    )
+except (OSError, AttributeError):
+    _DWM_SET_WINDOW_ATTRIBUTE = None
+
+
+def _set_dwm_window_attribute(hwnd: int, attribute: int, value: int) -> None:
+    """
+    设置窗口的 DWM 属性（属性值为32位整数）
+    
+    Args:
+        hwnd: 窗口句柄
+        attribute: DWMWINDOWATTRIBUTE 属性编号
+        value: 属性值
+    """
+    if _DWM_SET_WINDOW_ATTRIBUTE is None:
+        return
+    data = c_int(value)
+    _DWM_SET_WINDOW_ATTRIBUTE(hwnd, attribute, byref(data), sizeof(data))
+
+
+def _block_abs_sums_numpy(samples: np.ndarray, n_channels: int, block_size: int) -> Tuple[np.ndarray, int]:
+    """
+    统计每个音频块的振幅之和（NumPy 向量化实现）
+    
+    每帧的振幅为各声道采样之和的绝对值（int32 计算，避免 -32768 取绝对值时溢出）
+    
+    Args:
+        samples: int16 采样数组（多声道交错存放）
+        n_channels: 声道数
+        block_size: 每块包含的帧数
+        
+    Returns:
+        (每块振幅之和数组, 所有帧振幅之和)
+    """
+    n_frames = len(samples) // n_channels
+    if n_channels > 1:
+        frames = samples[:n_frames * n_channels].reshape(-1, n_channels)
+        abs_wave = np.abs(frames.sum(axis=1, dtype=np.int32))
+    else:
+        abs_wave = np.abs(samples, dtype=np.int32)
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.int64), 0
+    block_sums = np.add.reduceat(abs_wave, np.arange(0, n_frames, block_size), dtype=np.int64)
+    return block_sums, int(block_sums.sum())
+
+
+def _block_abs_sums_loop(samples: np.ndarray, n_channels: int, block_size: int) -> Tuple[np.ndarray, int]:
+    """
+    统计每个音频块的振幅之和（单次遍历实现，供 numba 编译）
+    
+    Args:
+        samples: int16 采样数组（多声道交错存放）
+        n_channels: 声道数
+        block_size: 每块包含的帧数
+        
+    Returns:
+        (每块振幅之和数组, 所有帧振幅之和)
+    """
+    n_frames = len(samples) // n_channels
+    block_sums = np.zeros((n_frames + block_size - 1) // block_size, dtype=np.int64)
+    total = 0
+    for frame in range(n_frames):
+        value = 0
+        base = frame * n_channels
+        for channel in range(n_channels):
+            value += samples[base + channel]
+        if value < 0:
+            value = -value
+        block_sums[frame // block_size] += value
+        total += value
+    return block_sums, total
+
+
+# 逐帧循环只有编译后才比 NumPy 快，未安装 numba 时使用向量化实现
+# 音频在后台线程中处理，编译后的循环运行时释放 GIL，不阻塞界面线程
+if njit is not None:
+    _block_abs_sums = njit(cache=True, nogil=True)(_block_abs_sums_loop)
+else:
+    _block_abs_sums = _block_abs_sums_numpy
+
 
 class KochWindow(QWidget):
     """Koch主窗口类"""
     
+    # ==================== 信号定义 ====================
+    # 后台音频处理完成：(是否为字符音频, 加载令牌, 缓存键, 摩尔斯码数据数组, 音频时长毫秒数)
+    morse_array_loaded = Signal(bool, int, object, object, int)
+    
     # ==================== 常量定义 ====================
     APPLICATION_VERSION = "v1.2.6"              # 应用程序版本
 
@@ -71,6 +175,12 @@ class KochWindow(QWidget):
 
     # 倒计时配置
     COUNTDOWN_SECONDS = 3                       # 倒计时秒数
+
+    # 进度显示配置
+    PROGRESS_UPDATE_INTERVAL = 66               # 播放进度显示的最小刷新间隔 (ms)，约15Hz
+
+    # 设置存储配置
+    SETTINGS_SYNC_DELAY = 200                   # 设置写入磁盘的合并延迟 (ms)
     
     # 颜色配置（BGR格式）
     DARK_THEME_COLOR = "#92E0D3"              # 深色主题主色调
@@ -79,6 +189,10 @@ class KochWindow(QWidget):
     LIGHT_THEME_COLOR = "#4A9B8E"             # 浅色主题主色调
     LIGHT_BACKGROUND_COLOR = "#F3F3F3"        # 浅色模式背景颜色
     LIGHT_TITLE_BAR_COLOR = 0x00F3F3F3          # 浅色模式标题栏颜色 RGB(243, 243, 243)
+
+    # 主题样式表（类定义时生成一次，切换主题时直接复用）
+    DARK_STYLESHEET = f"QWidget {{ background-color: {DARK_BACKGROUND_COLOR}; }}"    # 深色模式样式表
+    LIGHT_STYLESHEET = f"QWidget {{ background-color: {LIGHT_BACKGROUND_COLOR}; }}"  # 浅色模式样式表
     
     # 准确率评价阈值
     EXCELLENT_THRESHOLD = 95.0                  # 优秀
@@ -91,6 +205,8 @@ class KochWindow(QWidget):
     WAVEFORM_UPDATE_INTERVAL = 10               # 每次更新波形长度 (ms)
     WAVEFORM_WINDOW_SIZE = 1000                 # 波形显示窗口大小
     WAVEFORM_CHUNK_SIZE = 5                     # 每次波形更新块大小
+    WAVEFORM_EMPTY_RANGE = (-WAVEFORM_WINDOW_SIZE // 2, WAVEFORM_WINDOW_SIZE // 2)  # 清空波形后的显示范围
+    MORSE_CACHE_SIZE = 128                      # 摩尔斯码数据数组缓存的最大条目数
     
     # ==================== 类型注解 - UI控件 ====================
     # 布局对象
@@ -125,7 +241,7 @@ class KochWindow(QWidget):
     combo_lessons: ComboBox                     # 课程选择下拉框
     progress_char: Slider                       # 字符音频进度条
     progress_text: Slider                       # 文本音频进度条
-    text_input: TextEdit                        # 练习文本输入框
+    text_input: PlainTextEdit                   # 练习文本输入框
     
     # 按钮控件
     btn_char_play_pause: PushButton             # 字符音频播放/暂停按钮
@@ -142,13 +258,18 @@ class KochWindow(QWidget):
     char_audio_file: str                        # 字符音频文件路径
     char_audio_output: QAudioOutput             # 字符音频输出
     char_audio_duration: int                    # 字符音频总时长（毫秒）
-    char_morse_array: Optional[List[int]]       # 字符摩尔斯码音频数据数组
+    char_morse_array: Optional[np.ndarray]      # 字符摩尔斯码音频数据数组
+    char_shown_position: int                    # 字符音频上次刷新进度显示时的播放位置
     text_player: QMediaPlayer                   # 文本音频播放器
     text_audio_file: str                        # 文本音频文件路径
     text_audio_output: QAudioOutput             # 文本音频输出
     text_audio_duration: int                    # 文本音频总时长（毫秒）
-    text_morse_array: Optional[List[int]]       # 文本摩尔斯码音频数据数组
+    text_morse_array: Optional[np.ndarray]      # 文本摩尔斯码音频数据数组
+    text_shown_position: int                    # 文本音频上次刷新进度显示时的播放位置
     countdown_timer: QTimer                     # 倒计时定时器
+    audio_pool: QThreadPool                     # 音频处理线程池
+    char_morse_token: int                       # 字符音频最近一次加载请求的令牌
+    text_morse_token: int                       # 文本音频最近一次加载请求的令牌
 
     # ==================== 类型注解 - 设置面板 ====================
     settings_view: Optional[QWidget]            # 设置面板视图
@@ -160,21 +281,31 @@ class KochWindow(QWidget):
     switch_waveform: Optional[SwitchButton]     # 波形显示开关
 
     # ==================== 类型注解 - 波形图 ====================
-    plot_widget: Optional[pg.PlotWidget]        # 波形图控件
-    waveform_curve: Optional[pg.PlotCurveItem]  # 波形曲线
+    plot_widget: Optional["pg.PlotWidget"]      # 波形图控件（首次启用时创建）
+    waveform_curve: Optional["pg.PlotCurveItem"]  # 波形曲线
     waveform_timer: Optional[QTimer]            # 波形更新定时器
     waveform_ptr: int                           # 当前绘制位置指针
-    morse_array: Optional[List[int]]            # 当前音频摩尔斯码数据数组
+    waveform_source: Optional[np.ndarray]       # 电平段数据对应的摩尔斯码数据数组
+    waveform_edges: np.ndarray                  # 波形各电平段的起点位置
+    waveform_levels: np.ndarray                 # 波形各电平段的取值
+    waveform_empty: np.ndarray                  # 清空波形时使用的空数组
+    morse_array: Optional[np.ndarray]           # 当前音频摩尔斯码数据数组
+    morse_cache: Dict[Tuple[str, int], Tuple[np.ndarray, int]]  # 音频处理结果缓存（按路径和修改时间）
 
     # ==================== 类型注解 - 日志记录器 ====================
     logger: logging.Logger                      # 日志记录器
     
     # ==================== 类型注解 - 数据与状态 ====================
     settings: QSettings                         # 设置存储对象
+    settings_sync_timer: QTimer                 # 设置写入合并定时器
     total_characters: str                       # 所有字符序列
-    lesson_data: Dict[str, List[str]]           # 课程数据字典
+    char_indices: Dict[str, int]                # 字符到其在字符序列中位置的映射
+    lesson_data: Dict[str, Tuple[str, ...]]     # 课程数据字典
+    lesson_numbers: Dict[str, int]              # 课程名称到课程编号的映射
     current_lesson_name: Optional[str]          # 当前课程名称
+    current_lesson_num: int                     # 当前课程编号（1-40）
     current_text_index: int                     # 当前练习文本索引
+    lesson_text_counts: Dict[int, int]          # 课程编号到练习文本数量的缓存（切换课程时清空）
     is_result_checked: bool                     # 是否已检查结果
     is_char_playing: bool                       # 字符音频是否正在播放
     is_char_restart: bool                       # 字符音频重播状态
@@ -187,6 +318,8 @@ class KochWindow(QWidget):
     is_text_manually_seeked: bool               # 文本音频进度条手动拖动状态
     is_text_playback_finished: bool             # 文本音频播放是否结束
     is_text_updating: bool                      # 文本音频进度条更新状态
+    input_change_position: int                  # 输入框最近一次内容变化的起始位置
+    input_change_added: int                     # 输入框最近一次内容变化新增的字符数
     countdown_value: int                        # 倒计时当前值
     is_countdown_active: bool                   # 倒计时是否激活
     is_settings_tip_open: bool                  # 设置面板是否打开
@@ -222,7 +355,11 @@ class KochWindow(QWidget):
         self.is_text_updating = False   # 文本音频进度条更新状态（防止递归）
         
         self.current_lesson_name = None  # 当前课程名称
+        self.current_lesson_num = 1  # 当前课程编号（1-40）
         self.current_text_index = 0  # 当前练习文本索引（0-19）
+        self.lesson_text_counts = {}  # 课程编号到练习文本数量的缓存（切换课程时清空）
+        self.input_change_position = 0  # 输入框最近一次内容变化的起始位置
+        self.input_change_added = 0  # 输入框最近一次内容变化新增的字符数
 
         self.countdown_value = self.COUNTDOWN_SECONDS  # 倒计时当前值
         self.is_countdown_active = False  # 倒计时是否激活
@@ -233,6 +370,11 @@ class KochWindow(QWidget):
         
         # ==================== 初始化设置存储 ====================
         self.settings = QSettings("Koch", "LessonProgress")
+        # 合并短时间内的多次设置修改，只写一次磁盘（如拖动音量滑块）
+        self.settings_sync_timer = QTimer()
+        self.settings_sync_timer.setSingleShot(True)
+        self.settings_sync_timer.setInterval(self.SETTINGS_SYNC_DELAY)
+        self.settings_sync_timer.timeout.connect(self.settings.sync)
         
         # ==================== 窗口基础设置 ====================
         self.is_dark_theme = self.settings.value("dark_theme", False, type=bool)
@@ -243,13 +385,13 @@ class KochWindow(QWidget):
         if self.is_dark_theme:
             setTheme(Theme.DARK)
             setThemeColor(QColor(self.DARK_THEME_COLOR))
-            self.setStyleSheet(f"QWidget {{ background-color: {self.DARK_BACKGROUND_COLOR}; }}")
+            self.setStyleSheet(self.DARK_STYLESHEET)
             self.set_windows_title_bar_color(True)
             self.update_window_icon(True)
         else:
             setTheme(Theme.LIGHT)
             setThemeColor(QColor(self.LIGHT_THEME_COLOR))
-            self.setStyleSheet(f"QWidget {{ background-color: {self.LIGHT_BACKGROUND_COLOR}; }}")
+            self.setStyleSheet(self.LIGHT_STYLESHEET)
             self.set_windows_title_bar_color(False)
             self.update_window_icon(False)
 
@@ -262,10 +404,14 @@ class KochWindow(QWidget):
         self.waveform_curve = None  # 波形曲线
         self.waveform_ptr = 0  # 当前绘制位置指针
         self.morse_array = None  # 当前音频摩尔斯码数据数组
+        self.morse_cache = {}  # 音频处理结果缓存（按路径和修改时间）
+        self.waveform_source = None  # 电平段数据对应的摩尔斯码数据数组
+        self.waveform_edges = np.zeros(0, dtype=np.float64)  # 波形各电平段的起点位置
+        self.waveform_levels = np.zeros(0, dtype=np.float64)  # 波形各电平段的取值
+        self.waveform_empty = np.zeros(0, dtype=np.float64)  # 清空波形时使用的空数组
         self.waveform_timer = QTimer()  # 波形更新定时器
         self.waveform_timer.timeout.connect(self.update_waveform)
-        # 预创建波形图控件
-        self._create_waveform_widget()
+        # 波形图控件在首次启用波形显示时才创建（见 toggle_waveform）
         
         # ==================== 初始化课程数据 ====================
         self.init_lesson_data()
@@ -283,9 +429,17 @@ class KochWindow(QWidget):
         self.char_audio_file = None  # 字符音频文件路径
         self.char_audio_duration = 0  # 字符音频总时长（毫秒）
         self.char_morse_array = None  # 字符摩尔斯码音频数据数组
+        self.char_shown_position = -self.PROGRESS_UPDATE_INTERVAL  # 字符音频上次刷新进度显示时的播放位置
         self.text_audio_file = None  # 文本音频文件路径
         self.text_audio_duration = 0  # 文本音频总时长（毫秒）
         self.text_morse_array = None  # 文本摩尔斯码音频数据数组
+        self.text_shown_position = -self.PROGRESS_UPDATE_INTERVAL  # 文本音频上次刷新进度显示时的播放位置
+        # 音频处理在后台线程中进行（单线程，按提交顺序处理），结果通过信号交回主线程
+        self.audio_pool = QThreadPool(self)
+        self.audio_pool.setMaxThreadCount(1)
+        self.char_morse_token = 0  # 字符音频最近一次加载请求的令牌
+        self.text_morse_token = 0  # 文本音频最近一次加载请求的令牌
+        self.morse_array_loaded.connect(self.on_morse_array_loaded)
         
         # ==================== 设置用户界面 ====================
         self.setup_ui()
@@ -294,11 +448,9 @@ class KochWindow(QWidget):
         self.setup_shortcuts()
         
         # ==================== 加载上次保存的进度 ====================
-        # 临时断开信号连接，避免加载进度时触发保存
-        self.combo_lessons.currentTextChanged.disconnect(self.update_information)
-        self.load_lesson_progress()
-        # 重新连接信号
-        self.combo_lessons.currentTextChanged.connect(self.update_information)
+        # 加载进度期间阻塞下拉框信号，避免触发保存（退出 with 块时自动恢复）
+        with QSignalBlocker(self.combo_lessons):
+            self.load_lesson_progress()
     
     # ==================== 初始化方法 ====================
     
@@ -310,16 +462,23 @@ class KochWindow(QWidget):
         """
         # Koch方法推荐的字符学习序列
         self.total_characters = "KMURESNAPTLWI.JZ=FOY,VG5/Q92H38B?47C1D60X"
+        # 字符位置一次确定，加载字符音频时直接查表
+        self.char_indices = {char: i for i, char in enumerate(self.total_characters)}
         
         # 第1课：K和M
-        self.lesson_data = {f"01 - {', '.join(self.total_characters[:2])}": list(
-            self.total_characters[:2]
-        )}
+        lesson_chars = list(self.total_characters[:2])
+        first_lesson = f"01 - {', '.join(lesson_chars)}"
+        self.lesson_data = {first_lesson: tuple(lesson_chars)}
+        # 课程编号在此处一次确定，之后无需再从课程名称中解析
+        self.lesson_numbers = {first_lesson: 1}
 
-        # 第2 - 40课：逐步添加新字符
+        # 第2 - 40课：逐步添加新字符（在同一个列表上追加，每课保存一份只读快照）
         for i in range(2, len(self.total_characters)):
-            key = f"{i:02d} - {self.total_characters[i]}"
-            self.lesson_data[key] = list(self.total_characters[:i + 1])
+            char = self.total_characters[i]
+            lesson_chars.append(char)
+            lesson_name = f"{i:02d} - {char}"
+            self.lesson_data[lesson_name] = tuple(lesson_chars)
+            self.lesson_numbers[lesson_name] = i
     
     def init_media_players(self):
         """
@@ -550,14 +709,13 @@ class KochWindow(QWidget):
         self.hbox4.addLayout(self.hbox42)
     
     def _setup_row5(self):
-        """第五行：波形图显示（可选）"""
+        """第五行：波形图显示（可选，控件在首次启用时加入）"""
         self.hbox5 = QHBoxLayout()
-        self.hbox5.addWidget(self.plot_widget)
     
     def _setup_row6(self):
         """第六行：练习文本输入框"""
         self.hbox6 = QHBoxLayout()
-        self.text_input = TextEdit()
+        self.text_input = PlainTextEdit()  # 纯文本文档模型，排版开销比富文本编辑框小
         self.text_input.setPlaceholderText("Enter your practice text here...")
         self.text_input.setFixedHeight(89)
 
@@ -567,6 +725,8 @@ class KochWindow(QWidget):
         self.text_input.setFont(mono_font)
         
         # 连接文本变化信号，实时转换为大写
+        # 文档的 contentsChange 先给出本次变化的范围，随后 textChanged 只处理这部分文本
+        self.text_input.document().contentsChange.connect(self._record_input_change)
         self.text_input.textChanged.connect(self._convert_input_to_uppercase)
         
         self.hbox6.addWidget(self.text_input)
@@ -620,7 +780,14 @@ class KochWindow(QWidget):
         self.hbox7.addLayout(self.hbox73)
     
     def _create_waveform_widget(self):
-        """预创建波形图控件（初始隐藏状态）"""
+        """
+        创建波形图控件并加入第五行布局（初始隐藏状态）
+        
+        首次启用波形显示时才调用，未使用波形图时无需导入 pyqtgraph 和创建绘图场景
+        """
+        # 延迟导入，缩短程序启动时间
+        import pyqtgraph as pg
+        
         self.plot_widget = pg.PlotWidget(parent=self)
         self.plot_widget.setFixedHeight(94)  # 设置波形图高度
         self.plot_widget.plotItem.layout.setContentsMargins(5, 5, 5, 5)  # 设置边距
@@ -640,11 +807,13 @@ class KochWindow(QWidget):
         self.plot_widget.getViewBox().setMouseMode(pg.ViewBox.PanMode)  # 设置为平移模式
         self.plot_widget.hideButtons()  # 隐藏缩放按钮
 
-        self.waveform_curve = self.plot_widget.plot([], [], antialias=True, stepMode=True)  # 初始化波形曲线
+        # 阶梯波形只含水平和竖直线段，关闭抗锯齿不影响显示效果，可省去逐帧的抗锯齿光栅化
+        self.waveform_curve = self.plot_widget.plot([], [], antialias=False, stepMode=True)  # 初始化波形曲线
         self.waveform_curve.setZValue(100)  # 设置Z值，确保在顶部显示
 
         self.update_waveform_theme()  # 根据主题设置波形颜色
         self.plot_widget.hide()  # 初始隐藏波形图
+        self.hbox5.addWidget(self.plot_widget)
     
     # ==================== 快捷键设置 ====================
     
@@ -675,35 +844,53 @@ class KochWindow(QWidget):
         Returns:
             格式化的时间字符串，如 "01:23"
         """
-        seconds = milliseconds // 1000
-        minutes = seconds // 60
-        seconds = seconds % 60
-        return f"{minutes:02d}:{seconds:02d}"
+        # 播放位置每秒才变化一次显示内容，按整秒缓存格式化结果
+        return KochWindow._format_seconds(milliseconds // 1000)
     
     @staticmethod
-    def get_lesson_text_count(lesson_name: str) -> int:
+    @lru_cache(maxsize=4096)
+    def _format_seconds(total_seconds: int) -> str:
+        """
+        将秒数转换为 MM:SS 格式（结果按参数缓存）
+        
+        Args:
+            total_seconds: 秒数
+            
+        Returns:
+            格式化的时间字符串，如 "01:23"
+        """
+        minutes, seconds = divmod(total_seconds, 60)
+        return f"{minutes:02d}:{seconds:02d}"
+    
+    def get_lesson_text_count(self, lesson_num: int) -> int:
         """
         获取指定课程的练习文本数量(课程文件夹下文件数量的一半)
+        
+        结果按课程编号缓存在 lesson_text_counts 中，同一课程内切换文本时不再扫描目录；
+        切换课程时缓存被清空，重新生成的训练材料在下次加载课程时生效
 
         Args:
-            lesson_name: 课程名称,如 "01 - K, M"
+            lesson_num: 课程编号(1-40)
         
         Returns:
             练习文本数量
         """
-        lesson_num = lesson_name.split(" ")[0]
-        lesson_folder = config.get_lesson_dir(int(lesson_num))
+        count = self.lesson_text_counts.get(lesson_num)
+        if count is not None:
+            return count
+        lesson_folder = config.get_lesson_dir(lesson_num)
 
         try:
             # 统计文件夹下的音频文件数量
-            audio_files = list(lesson_folder.glob("koch-*.wav"))
-            total_files = len(audio_files)
+            total_files = sum(1 for _ in lesson_folder.glob("koch-*.wav"))
         
             # 返回文件数量的一半(向下取整)
-            return total_files // 2
+            count = total_files // 2
         except (OSError, FileNotFoundError):
             # 如果文件夹不存在或出错,返回默认值10
             return 0
+        self.lesson_text_counts[lesson_num] = count
+        return count
     
     def set_play_button_state(self, button: PushButton, is_playing: bool):
         """
@@ -731,29 +918,45 @@ class KochWindow(QWidget):
             if widget is not None:
                 widget.deleteLater()
     
+    def _record_input_change(self, position: int, chars_removed: int, chars_added: int):
+        """
+        记录输入框文档最近一次内容变化的范围
+        
+        Args:
+            position: 变化的起始位置
+            chars_removed: 删除的字符数
+            chars_added: 新增的字符数
+        """
+        self.input_change_position = position
+        self.input_change_added = chars_added
+    
     def _convert_input_to_uppercase(self):
         """
-        将文本输入框中的内容实时转换为大写
-        保持光标位置不变，避免干扰用户输入体验
+        将文本输入框中新输入的内容实时转换为大写
+        只替换本次新增的字符，不重设整个文档，光标位置和撤销记录保持不变
         """
-        # 获取当前光标位置
-        cursor = self.text_input.textCursor()
-        current_position = cursor.position()
-        
-        # 获取当前文本
-        current_text = self.text_input.toPlainText()
-        upper_text = current_text.upper()
+        if self.input_change_added <= 0:
+            return
+        document = self.text_input.document()
+        start = self.input_change_position
+        # 替换整个文档时 Qt 报告的新增字符数会包含末尾的段落分隔符
+        end = min(start + self.input_change_added, document.characterCount() - 1)
+        
+        # 选中新增的文本
+        cursor = QTextCursor(document)
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        inserted_text = cursor.selectedText()
+        upper_text = inserted_text.upper()
         
         # 只有在文本实际改变时才更新（避免无限循环）
-        if current_text != upper_text:
+        if inserted_text != upper_text:
             # 使用信号阻塞器，避免递归触发
             with QSignalBlocker(self.text_input):
-                # 设置大写文本
-                self.text_input.setPlainText(upper_text)
-            
-                # 恢复光标位置
-                cursor.setPosition(current_position)
-                self.text_input.setTextCursor(cursor)
+                # 与本次输入合并为同一个撤销步骤
+                cursor.joinPreviousEditBlock()
+                cursor.insertText(upper_text)
+                cursor.endEditBlock()
     
     def _reset_check_button(self):
         """重置检查按钮到初始状态（内部方法）"""
@@ -783,43 +986,208 @@ class KochWindow(QWidget):
         else:
             return ""
     
-    def process_audio_to_morse(self, audio_path: str) -> List[int]:
+    @staticmethod
+    def read_wav_samples(audio_path: str) -> Tuple[np.ndarray, int, int]:
+        """
+        读取 16 位 PCM WAV 文件的全部采样
+        
+        只解析 RIFF 块头定位 fmt 和 data 块，采样数据通过 np.memmap 映射为只读数组，
+        由系统按需读入页面，既不经过 wave 模块的 bytes 中转也不额外分配内存
+        
+        Args:
+            audio_path: 音频文件路径
+            
+        Returns:
+            (int16 采样数组（多声道交错存放）, 声道数, 采样率)
+        
+        Raises:
+            ValueError: 文件不是 16 位 PCM WAV 格式
+        """
+        with open(audio_path, 'rb') as f:
+            riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+            if riff != b'RIFF' or wave_id != b'WAVE':
+                raise ValueError(f"Not a WAV file: {audio_path}")
+            n_channels = sample_rate = bits_per_sample = 0
+            while True:
+                chunk_header = f.read(8)
+                if len(chunk_header) < 8:
+                    raise ValueError(f"Missing data chunk: {audio_path}")
+                chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+                if chunk_id == b'fmt ':
+                    fmt_data = f.read(chunk_size + (chunk_size & 1))  # 块按偶数字节对齐
+                    n_channels, sample_rate = struct.unpack_from('<HI', fmt_data, 2)
+                    bits_per_sample, = struct.unpack_from('<H', fmt_data, 14)
+                elif chunk_id == b'data':
+                    if bits_per_sample != 16 or n_channels == 0:
+                        raise ValueError(f"Unsupported WAV format: {audio_path}")
+                    data_offset = f.tell()
+                    # 截断的文件以实际长度为准
+                    count = min(chunk_size, os.fstat(f.fileno()).st_size - data_offset) // 2
+                    if count <= 0:
+                        return np.empty(0, dtype='<i2'), n_channels, sample_rate
+                    samples = np.memmap(f, dtype='<i2', mode='r', offset=data_offset, shape=(count,))
+                    return samples.view(np.ndarray), n_channels, sample_rate
+                else:
+                    f.seek(chunk_size + (chunk_size & 1), 1)  # 跳过其他块
+    
+    @classmethod
+    def process_audio_to_morse(cls, audio_path: str) -> Tuple[np.ndarray, int]:
         """
         处理音频文件，提取摩尔斯码音频数据数组
         
+        不访问实例状态，可以在后台线程中调用
+        
         Args:
             audio_path: 音频文件路径
             
         Returns:
-            摩尔斯码音频数据数组
+            (摩尔斯码音频数据数组, 音频时长毫秒数)
+            数组为只读的 uint8 数组（每块 0 或 1），每块只占一个字节
+        
+        Raises:
+            OSError: 文件读取失败
+            ValueError: 文件不是 16 位 PCM WAV 格式
+        """
+        wave_data, n_channels, sample_rate = cls.read_wav_samples(audio_path)
+        n_frames = len(wave_data) // n_channels
+        
+        # 一次遍历同时得到各块振幅之和与总振幅
+        # 多声道的各声道采样直接按整数相加转为单声道，振幅为各声道平均值的 n_channels 倍
+        block_sums, total_sum = _block_abs_sums(wave_data, n_channels, cls.MORSE_BLOCK_SIZE)
+        amplitude_scale = n_channels  # 将振幅换算回各声道平均值
+        wave_avg = int(total_sum / n_frames / amplitude_scale // 10) * 10 if n_frames else 0  # 计算平均振幅（向下取整到10的倍数）
+        audio_duration = int((n_frames / sample_rate) * 1000)  # 毫秒
+
+        # 各块平均振幅与平均振幅比较（最后一块可能不足 MORSE_BLOCK_SIZE 个采样）
+        block_starts = np.arange(0, n_frames, cls.MORSE_BLOCK_SIZE)
+        if len(block_starts) > 0:
+            block_lens = np.diff(block_starts, append=n_frames)
+            morse_arr = (block_sums / (block_lens * amplitude_scale) > wave_avg).astype(np.uint8)
+        else:
+            morse_arr = np.zeros(0, dtype=np.uint8)
+        morse_arr.setflags(write=False)  # 结果会被缓存共享，禁止修改
+        return morse_arr, audio_duration
+    
+    def load_morse_array(self, audio_path: str, flag: bool):
+        """
+        加载音频文件对应的摩尔斯码数据数组
+        
+        同一文件未被修改时直接使用缓存的结果，否则提交到后台线程处理，
+        处理完成后由 on_morse_array_loaded 在主线程中应用结果
+        
+        Args:
+            audio_path: 音频文件路径
+            flag: True 表示字符音频，False 表示文本音频
         """
+        # 每次请求使用新的令牌，之前尚未完成的请求结果将被丢弃
+        if flag:
+            self.char_morse_token += 1
+            token = self.char_morse_token
+        else:
+            self.text_morse_token += 1
+            token = self.text_morse_token
+
         try:
-            audio = wave.open(audio_path, 'rb')
-            n_channels, _, sample_rate, n_frames = audio.getparams()[:4]
-            str_wave_data = audio.readframes(n_frames)
-            audio.close()
-
-            wave_data = np.frombuffer(str_wave_data, dtype=np.short)
-            if n_channels == 2:
-                wave_data = wave_data.reshape(-1, 2).mean(axis=1)  # 转为单声道
-            
-            wave_avg = int(np.mean(np.abs(wave_data / 10))) * 10 # 计算平均振幅
-            audio_duration = int((n_frames / sample_rate) * 1000)  # 毫秒
-
-            morse_arr = []
-            for i in range(0, len(wave_data), self.MORSE_BLOCK_SIZE):
-                block = wave_data[i:i + self.MORSE_BLOCK_SIZE]
-                if len(block) == 0:
-                    continue
-                value = 1 if np.mean(np.abs(block)) > wave_avg else 0
-                morse_arr.append(value)
-            
-            return morse_arr, audio_duration
-        except Exception as e:
+            # 以路径和修改时间作为缓存键，文件被重新生成后自动失效
+            cache_key = (audio_path, os.stat(audio_path).st_mtime_ns)
+        except OSError as e:
             self.logger.error(f"Error processing audio: {e}")
-            return [], 0
+            self._set_morse_array(flag, np.zeros(0, dtype=np.uint8), 0)
+            return
+        cached = self.morse_cache.get(cache_key)
+        if cached is not None:
+            self._set_morse_array(flag, *cached)
+            return
+
+        # 处理完成前没有可用的波形数据
+        self._set_morse_array(flag, None, 0)
+
+        def task():
+            # 排队期间已有更新的请求，无需再处理
+            if token != (self.char_morse_token if flag else self.text_morse_token):
+                return
+            try:
+                morse_arr, audio_duration = self.process_audio_to_morse(audio_path)
+                key = cache_key
+            except Exception as e:
+                self.logger.error(f"Error processing audio: {e}")
+                morse_arr, audio_duration, key = np.zeros(0, dtype=np.uint8), 0, None
+            self.morse_array_loaded.emit(flag, token, key, morse_arr, audio_duration)
+
+        self.audio_pool.start(task)
     
-    def load_waveform(self, morse_array: Optional[List[int]], flag: bool, start_position: int = 0):
+    def on_morse_array_loaded(
+        self, flag: bool, token: int, cache_key: Optional[Tuple[str, int]],
+        morse_arr: np.ndarray, audio_duration: int
+    ):
+        """
+        后台音频处理完成的回调（在主线程中执行）
+        
+        Args:
+            flag: True 表示字符音频，False 表示文本音频
+            token: 加载请求的令牌
+            cache_key: 缓存键，处理失败时为 None
+            morse_arr: 摩尔斯码音频数据数组
+            audio_duration: 音频时长毫秒数
+        """
+        # 缓存只在主线程中读写；过期请求的结果同样有效，照常缓存
+        if cache_key is not None and cache_key not in self.morse_cache:
+            # 缓存已满时淘汰最早加入的结果
+            if len(self.morse_cache) >= self.MORSE_CACHE_SIZE:
+                del self.morse_cache[next(iter(self.morse_cache))]
+            self.morse_cache[cache_key] = (morse_arr, audio_duration)
+
+        if token != (self.char_morse_token if flag else self.text_morse_token):
+            return
+        self._set_morse_array(flag, morse_arr, audio_duration)
+
+        # 数据就绪前已经开始播放时，补上波形显示
+        is_playing = self.is_char_playing if flag else self.is_text_playing
+        if is_playing and self.is_waveform_enabled and self.plot_widget is not None:
+            player = self.char_player if flag else self.text_player
+            self.load_waveform(morse_arr, flag, player.position())
+            if self.waveform_timer is not None:
+                self.waveform_timer.start(self.WAVEFORM_UPDATE_INTERVAL)
+    
+    def _set_morse_array(self, flag: bool, morse_arr: Optional[np.ndarray], audio_duration: int):
+        """保存字符或文本音频的摩尔斯码数据数组及音频时长"""
+        if flag:
+            self.char_morse_array, self.char_audio_duration = morse_arr, audio_duration
+        else:
+            self.text_morse_array, self.text_audio_duration = morse_arr, audio_duration
+    
+    def _draw_waveform(self, morse_array: np.ndarray, count: int):
+        """
+        绘制摩尔斯码数据数组的前 count 个数据点
+        
+        波形只有 0 和 1 两种取值，将连续相同取值的数据点合并为一个电平段后再交给阶梯曲线，
+        绘制结果与逐点绘制完全相同，但顶点数只与电平跳变次数有关，与音频长度无关
+        
+        Args:
+            morse_array: 摩尔斯码音频数据数组
+            count: 要绘制的数据点数量（大于0）
+        """
+        # 同一数组只计算一次电平段
+        if morse_array is not self.waveform_source:
+            change_points = np.flatnonzero(morse_array[1:] != morse_array[:-1]) + 1
+            edges = np.concatenate(([0], change_points)) if len(morse_array) else change_points
+            self.waveform_edges = edges.astype(np.float64)
+            self.waveform_levels = morse_array[edges].astype(np.float64)  # 电平段很少，转换为曲线使用的浮点类型
+            self.waveform_source = morse_array
+        # 起点在 count 之前的电平段数量，最后一段在 count 处截断
+        n_steps = int(np.searchsorted(self.waveform_edges, count))
+        x_data = np.empty(n_steps + 1, dtype=np.float64)
+        x_data[:n_steps] = self.waveform_edges[:n_steps]
+        x_data[n_steps] = count
+        self.waveform_curve.setData(x_data, self.waveform_levels[:n_steps])
+    
+    def _reset_waveform(self):
+        """清空波形曲线，波形指针归零并恢复初始显示范围"""
+        self.waveform_ptr = 0
+        self.waveform_curve.setData(self.waveform_empty, self.waveform_empty)
+        self.plot_widget.setXRange(*self.WAVEFORM_EMPTY_RANGE, padding=0)
+    
+    def load_waveform(self, morse_array: Optional[np.ndarray], flag: bool, start_position: int = 0):
         """
         加载音频文件并处理波形数据
         
@@ -834,7 +1202,7 @@ class KochWindow(QWidget):
         self.morse_array = morse_array
 
         # 根据播放位置计算波形指针位置
-        if self.morse_array and start_position > 0:
+        if len(self.morse_array) > 0 and start_position > 0:
             if flag:
                 audio_duration = self.char_audio_duration
             else:
@@ -845,8 +1213,8 @@ class KochWindow(QWidget):
                 self.waveform_ptr = int(progress_ratio * len(self.morse_array))
         elif start_position == 0:
             # 如果波形指针已经到达末尾，不要重置
-            is_char_waveform = (morse_array == self.char_morse_array)
-            is_text_waveform = (morse_array == self.text_morse_array)
+            is_char_waveform = morse_array is self.char_morse_array
+            is_text_waveform = morse_array is self.text_morse_array
             if is_char_waveform and self.is_char_playback_finished and self.waveform_ptr >= len(self.morse_array):
                 return
             elif is_text_waveform and self.is_text_playback_finished and self.waveform_ptr >= len(self.morse_array):
@@ -857,9 +1225,7 @@ class KochWindow(QWidget):
         # 重置波形曲线
         if self.waveform_curve is not None:
             if self.waveform_ptr > 0:  # 如果有数据，绘制初始波形
-                y_data = self.morse_array[:self.waveform_ptr]
-                x_data = list(range(len(y_data) + 1))
-                self.waveform_curve.setData(x_data, y_data)
+                self._draw_waveform(self.morse_array, self.waveform_ptr)
 
                 center = self.waveform_ptr
                 x_min = center - self.WAVEFORM_WINDOW_SIZE  # 左侧显示整个窗口
@@ -870,8 +1236,7 @@ class KochWindow(QWidget):
                 # x_max = center + self.WAVEFORM_WINDOW_SIZE // 2  # 右侧显示50%的窗口
                 self.plot_widget.setXRange(x_min, x_max, padding=0)
             else:  # 从头开始，清空波形
-                self.waveform_curve.setData([], [])
-                self.plot_widget.setXRange(-self.WAVEFORM_WINDOW_SIZE // 2, self.WAVEFORM_WINDOW_SIZE // 2, padding=0)
+                self._reset_waveform()
     
     def update_waveform(self):
         """更新波形图显示"""
@@ -899,6 +1264,8 @@ class KochWindow(QWidget):
             if self.waveform_timer is not None:
                 self.waveform_timer.stop()
             return
+        # 记录推进前的指针位置，指针未变化时无需重绘
+        previous_ptr = self.waveform_ptr
         # 如果当前位置远落后于目标位置，快速推进
         if target_ptr > self.waveform_ptr:
             distance = target_ptr - self.waveform_ptr
@@ -910,11 +1277,12 @@ class KochWindow(QWidget):
         elif target_ptr < self.waveform_ptr:
             # 播放被拖动到前面，回退波形指针
             self.waveform_ptr = target_ptr
+        # 波形没有新增数据点，保留上一帧的显示
+        if self.waveform_ptr == previous_ptr:
+            return
         # 绘制当前波形
         if self.waveform_ptr > 0:
-            y_data = self.morse_array[:self.waveform_ptr]
-            x_data = list(range(len(y_data) + 1))
-            self.waveform_curve.setData(x_data, y_data)
+            self._draw_waveform(self.morse_array, self.waveform_ptr)
             # 调整X轴范围以保持波形居中
             center = self.waveform_ptr
             x_min = center - self.WAVEFORM_WINDOW_SIZE  # 左侧显示整个窗口
@@ -943,9 +1311,13 @@ class KochWindow(QWidget):
                 f"{lesson_name}_index", 0, type=int
             )
         
+        # 重新加载课程时重新统计练习文本数量
+        self.lesson_text_counts.clear()
+        
         # 更新当前课程信息
         self.current_lesson_name = lesson_name
-        self.label_lesson_num.setText(lesson_name.split(" ")[0])
+        self.current_lesson_num = self.lesson_numbers[lesson_name]
+        self.label_lesson_num.setText(f"{self.current_lesson_num:02d}")
         
         # 清空并重新生成字符显示
         self.clear_layout(self.hbox21)
@@ -966,7 +1338,7 @@ class KochWindow(QWidget):
         
         # 更新字符声音显示
         # 第一次课只显示第一个字符，其他课显示最新学习的字符
-        if lesson_name == "01 - K, M":
+        if self.current_lesson_num == 1:
             self.label_char_sound.setText(self.lesson_data[lesson_name][0])
         else:
             self.label_char_sound.setText(self.lesson_data[lesson_name][-1])
@@ -1051,12 +1423,12 @@ class KochWindow(QWidget):
         根据当前显示的字符加载对应的音频
         """
         current_character = self.label_char_sound.text()
-        char_index = self.total_characters.index(current_character)
+        char_index = self.char_indices[current_character]
         
-        self.char_audio_file = config.get_character_audio(char_index)  # 使用 pathlib 构建音频文件路径
+        self.char_audio_file = str(config.get_character_audio(char_index))  # 转换一次字符串路径，后续直接复用
         self.logger.debug(f"Loading character audio: {current_character} from {self.char_audio_file}")
-        self.char_morse_array, self.char_audio_duration = self.process_audio_to_morse(str(self.char_audio_file))
-        self.char_player.setSource(QUrl.fromLocalFile(str(self.char_audio_file)))
+        self.load_morse_array(self.char_audio_file, True)
+        self.char_player.setSource(QUrl.fromLocalFile(self.char_audio_file))
 
         if self.is_waveform_enabled and self.plot_widget is not None:
             # 停止波形更新定时器
@@ -1064,9 +1436,7 @@ class KochWindow(QWidget):
                 self.waveform_timer.stop()
             # 重置波形图指针
             if self.is_waveform_enabled:
-                self.waveform_ptr = 0
-                self.waveform_curve.setData([], [])
-                self.plot_widget.setXRange(-self.WAVEFORM_WINDOW_SIZE // 2, self.WAVEFORM_WINDOW_SIZE // 2, padding=0)
+                self._reset_waveform()
 
         self.is_char_playback_finished = True
     
@@ -1081,9 +1451,7 @@ class KochWindow(QWidget):
                 if self.waveform_timer is not None:
                     self.waveform_timer.stop()
                 if self.is_waveform_enabled:
-                    self.waveform_ptr = 0
-                    self.waveform_curve.setData([], [])
-                    self.plot_widget.setXRange(-self.WAVEFORM_WINDOW_SIZE // 2, self.WAVEFORM_WINDOW_SIZE // 2, padding=0)
+                    self._reset_waveform()
                 self.set_play_button_state(self.btn_text_play_pause, False)
                 self.is_text_playing = False
             if self.char_player.position() == 0 and self.is_char_playback_finished:
@@ -1119,9 +1487,7 @@ class KochWindow(QWidget):
             self.waveform_timer.stop()
         # 重置波形图指针
         if self.is_waveform_enabled:
-            self.waveform_ptr = 0
-            self.waveform_curve.setData([], [])
-            self.plot_widget.setXRange(-self.WAVEFORM_WINDOW_SIZE // 2, self.WAVEFORM_WINDOW_SIZE // 2, padding=0)
+            self._reset_waveform()
         # 重置播放按钮和状态
         self.set_play_button_state(self.btn_char_play_pause, False)
         self.is_char_playback_finished = True
@@ -1136,12 +1502,20 @@ class KochWindow(QWidget):
             position: 当前播放位置（毫秒）
         """
         if not self.is_char_seeking:
+            # 正常播放时位置变化很密集，同一秒内间隔不足刷新间隔的前进不刷新显示
+            # 跳转、回退和跨秒的位置仍立即刷新
+            delta = position - self.char_shown_position
+            if 0 <= delta < self.PROGRESS_UPDATE_INTERVAL and position // 1000 == self.char_shown_position // 1000:
+                return
+            self.char_shown_position = position
             if self.char_player.duration() > 0:
                 progress = int((position / self.char_player.duration()) * 1000)
-                # 使用标志位防止递归
-                self.is_char_updating = True
-                self.progress_char.setValue(progress)
-                self.is_char_updating = False
+                # 进度条数值未变化时无需设置（进度条1000格，多数位置变化落在同一格内）
+                if progress != self.progress_char.value():
+                    # 使用标志位防止递归（不能阻塞进度条信号，滑块位置依赖 valueChanged 更新）
+                    self.is_char_updating = True
+                    self.progress_char.setValue(progress)
+                    self.is_char_updating = False
             self.label_char_current_time.setText(self.format_time(position))
     
     def update_char_duration(self, duration: int):
@@ -1170,10 +1544,8 @@ class KochWindow(QWidget):
             # 加载完整波形
             if self.is_waveform_enabled and self.char_morse_array is not None:
                 self.waveform_ptr = len(self.char_morse_array)
-                y_data = self.char_morse_array
-                x_data = list(range(len(y_data) + 1))
-                self.waveform_curve.setData(x_data, y_data)
-                self.plot_widget.setXRange(0, max(x_data), padding=0)
+                self._draw_waveform(self.char_morse_array, self.waveform_ptr)
+                self.plot_widget.setXRange(0, self.waveform_ptr, padding=0)
             # 重置播放按钮和进度条
             self.set_play_button_state(self.btn_char_play_pause, False)
             self.is_char_playing = False
@@ -1238,12 +1610,12 @@ class KochWindow(QWidget):
         加载练习文本音频文件
         根据当前课程和文本索引加载对应的音频
         """
-        lesson_num = self.label_lesson_num.text()
-        self.text_audio_file = config.get_lesson_audio(int(lesson_num), self.current_text_index + 1)
+        lesson_num = self.current_lesson_num
+        self.text_audio_file = str(config.get_lesson_audio(lesson_num, self.current_text_index + 1))
 
-        self.logger.debug(f"Loading practice text audio for lesson {lesson_num}, index {self.current_text_index + 1}")
-        self.text_morse_array, self.text_audio_duration = self.process_audio_to_morse(str(self.text_audio_file))
-        self.text_player.setSource(QUrl.fromLocalFile(str(self.text_audio_file)))
+        self.logger.debug(f"Loading practice text audio for lesson {lesson_num:02d}, index {self.current_text_index + 1}")
+        self.load_morse_array(self.text_audio_file, False)
+        self.text_player.setSource(QUrl.fromLocalFile(self.text_audio_file))
 
         if self.is_waveform_enabled and self.plot_widget is not None:
             # 停止波形更新定时器
@@ -1251,9 +1623,7 @@ class KochWindow(QWidget):
                 self.waveform_timer.stop()
             # 重置波形图指针
             if self.is_waveform_enabled:
-                self.waveform_ptr = 0
-                self.waveform_curve.setData([], [])
-                self.plot_widget.setXRange(-self.WAVEFORM_WINDOW_SIZE // 2, self.WAVEFORM_WINDOW_SIZE // 2, padding=0)
+                self._reset_waveform()
 
         # 使用信号阻塞器，避免触发信号
         with QSignalBlocker(self.text_input):
@@ -1284,9 +1654,7 @@ class KochWindow(QWidget):
                 if self.waveform_timer is not None:
                     self.waveform_timer.stop()
                 if self.is_waveform_enabled:
-                    self.waveform_ptr = 0
-                    self.waveform_curve.setData([], [])
-                    self.plot_widget.setXRange(-self.WAVEFORM_WINDOW_SIZE // 2, self.WAVEFORM_WINDOW_SIZE // 2, padding=0)
+                    self._reset_waveform()
                 self.set_play_button_state(self.btn_char_play_pause, False)
                 self.is_char_playing = False
             # 如果从头开始播放且之前播放已结束，启动倒计时
@@ -1325,9 +1693,7 @@ class KochWindow(QWidget):
             self.waveform_timer.stop()
         # 重置波形图指针
         if self.is_waveform_enabled:
-            self.waveform_ptr = 0
-            self.waveform_curve.setData([], [])
-            self.plot_widget.setXRange(-self.WAVEFORM_WINDOW_SIZE // 2, self.WAVEFORM_WINDOW_SIZE // 2, padding=0)
+            self._reset_waveform()
         # 设置按钮为取消状态
         self.btn_text_play_pause.setText("Cancel")
         self.btn_text_play_pause.setIcon(FluentIcon.CANCEL)
@@ -1386,9 +1752,7 @@ class KochWindow(QWidget):
             self.waveform_timer.stop()
         # 重置波形图指针
         if self.is_waveform_enabled:
-            self.waveform_ptr = 0
-            self.waveform_curve.setData([], [])
-            self.plot_widget.setXRange(-self.WAVEFORM_WINDOW_SIZE // 2, self.WAVEFORM_WINDOW_SIZE // 2, padding=0)
+            self._reset_waveform()
         # 重置标志位
         self.is_text_manually_seeked = False
         self.is_text_playback_finished = True
@@ -1405,12 +1769,20 @@ class KochWindow(QWidget):
             position: 当前播放位置（毫秒）
         """
         if not self.is_text_seeking:
+            # 正常播放时位置变化很密集，同一秒内间隔不足刷新间隔的前进不刷新显示
+            # 跳转、回退和跨秒的位置仍立即刷新
+            delta = position - self.text_shown_position
+            if 0 <= delta < self.PROGRESS_UPDATE_INTERVAL and position // 1000 == self.text_shown_position // 1000:
+                return
+            self.text_shown_position = position
             if self.text_player.duration() > 0:
                 progress = int((position / self.text_player.duration()) * 1000)
-                # 使用标志位防止递归
-                self.is_text_updating = True
-                self.progress_text.setValue(progress)
-                self.is_text_updating = False
+                # 进度条数值未变化时无需设置（进度条1000格，多数位置变化落在同一格内）
+                if progress != self.progress_text.value():
+                    # 使用标志位防止递归（不能阻塞进度条信号，滑块位置依赖 valueChanged 更新）
+                    self.is_text_updating = True
+                    self.progress_text.setValue(progress)
+                    self.is_text_updating = False
             self.label_text_current_time.setText(self.format_time(position))
     
     def update_text_duration(self, duration: int):
@@ -1437,10 +1809,8 @@ class KochWindow(QWidget):
             # 加载完整波形
             if self.is_waveform_enabled and self.text_morse_array is not None:
                 self.waveform_ptr = len(self.text_morse_array)
-                y_data = self.text_morse_array
-                x_data = list(range(len(y_data) + 1))
-                self.waveform_curve.setData(x_data, y_data)
-                self.plot_widget.setXRange(0, max(x_data), padding=0)
+                self._draw_waveform(self.text_morse_array, self.waveform_ptr)
+                self.plot_widget.setXRange(0, self.waveform_ptr, padding=0)
             # 如果当前正在播放，说明是自然播放完成
             if self.is_text_playing:
                 self.is_text_playback_finished = True
@@ -1545,8 +1915,7 @@ class KochWindow(QWidget):
             practice_text = practice_text.replace("\n", " ").strip()
             
             # 读取标准答案文件（使用 pathlib）
-            lesson_num = self.label_lesson_num.text()
-            result_file = config.get_lesson_text(int(lesson_num), self.current_text_index + 1)
+            result_file = config.get_lesson_text(self.current_lesson_num, self.current_text_index + 1)
             
             try:
                 with open(result_file, "r", encoding="utf-8") as f:
@@ -1602,8 +1971,9 @@ class KochWindow(QWidget):
 
                 full_html = html_text + separator + answer_text
 
-                # 显示高亮结果（不清空内容）
-                self.text_input.setHtml(full_html)
+                # 显示高亮结果（纯文本编辑框通过 appendHtml 保留字符颜色格式）
+                self.text_input.clear()
+                self.text_input.appendHtml(full_html)
 
                 # 设置text_input为只读，防止用户修改结果
                 self.text_input.setReadOnly(True)
@@ -1645,7 +2015,7 @@ class KochWindow(QWidget):
         索引循环范围根据当前课程的文本数量决定
         """
         # 获取当前课程的文本数量
-        max_texts = self.get_lesson_text_count(self.current_lesson_name)
+        max_texts = self.get_lesson_text_count(self.current_lesson_num)
         
         self.current_text_index += 1
         if self.current_text_index >= max_texts:
@@ -1656,6 +2026,14 @@ class KochWindow(QWidget):
     
     # ==================== 进度保存与加载 ====================
     
+    def schedule_settings_sync(self):
+        """
+        延迟写入设置
+        
+        在合并延迟内的多次调用只会触发一次 QSettings.sync()
+        """
+        self.settings_sync_timer.start()
+    
     def save_lesson_name(self, lesson_name: str):
         """
         保存当前课程名称
@@ -1664,7 +2042,7 @@ class KochWindow(QWidget):
             lesson_name: 要保存的课程名称
         """
         self.settings.setValue("current_lesson", lesson_name)
-        self.settings.sync()
+        self.schedule_settings_sync()
     
     def save_lesson_progress(self, lesson_name: str, text_index: int):
         """
@@ -1848,14 +2226,9 @@ class KochWindow(QWidget):
             hwnd = int(self.settings_view.winId())
             
             dwmwa_window_corner_preference = 33
-            corner_preference = c_int(2)
+            corner_preference = 2
             
-            windll.dwmapi.DwmSetWindowAttribute(
-                hwnd,
-                dwmwa_window_corner_preference,
-                byref(corner_preference),
-                sizeof(corner_preference)
-            )
+            _set_dwm_window_attribute(hwnd, dwmwa_window_corner_preference, corner_preference)
         except AttributeError:
             pass
 
@@ -1896,7 +2269,7 @@ class KochWindow(QWidget):
             self.label_volume.setText(f"{value}%")
         # 保存音量设置
         self.settings.setValue("volume", volume)
-        self.settings.sync()
+        self.schedule_settings_sync()
     
     def on_transparency_changed(self, value: int):
         """
@@ -1924,14 +2297,14 @@ class KochWindow(QWidget):
         if checked:  # 深色主题
             setTheme(Theme.DARK)
             setThemeColor(QColor(self.DARK_THEME_COLOR))
-            self.setStyleSheet(f"QWidget {{ background-color: {self.DARK_BACKGROUND_COLOR}; }}")
+            self.setStyleSheet(self.DARK_STYLESHEET)
             self.set_windows_title_bar_color(True)
             self.update_window_icon(True)
             self.is_dark_theme = True
         else:  # 浅色主题
             setTheme(Theme.LIGHT)
             setThemeColor(QColor(self.LIGHT_THEME_COLOR))
-            self.setStyleSheet(f"QWidget {{ background-color: {self.LIGHT_BACKGROUND_COLOR}; }}")
+            self.setStyleSheet(self.LIGHT_STYLESHEET)
             self.set_windows_title_bar_color(False)
             self.update_window_icon(False)
             self.is_dark_theme = False
@@ -1942,7 +2315,7 @@ class KochWindow(QWidget):
         
         # 保存主题设置
         self.settings.setValue("dark_theme", self.is_dark_theme)
-        self.settings.sync()
+        self.schedule_settings_sync()
     
     def update_window_icon(self, dark_mode: bool):
         """
@@ -1979,27 +2352,16 @@ class KochWindow(QWidget):
             
             # 设置深色/浅色模式
             dwmwa_use_immersive_dark_mode = 20
-            value = c_int(1 if dark_mode else 0)
-            windll.dwmapi.DwmSetWindowAttribute(
-                hwnd, dwmwa_use_immersive_dark_mode, byref(value), sizeof(value)
-            )
+            _set_dwm_window_attribute(hwnd, dwmwa_use_immersive_dark_mode, 1 if dark_mode else 0)
             
             # 设置标题栏颜色
             dwmwa_caption_color = 35
-            color_value = c_int(
-                self.DARK_TITLE_BAR_COLOR if dark_mode else self.LIGHT_TITLE_BAR_COLOR
-            )
-            windll.dwmapi.DwmSetWindowAttribute(
-                hwnd, dwmwa_caption_color, byref(color_value), sizeof(color_value)
-            )
+            color_value = self.DARK_TITLE_BAR_COLOR if dark_mode else self.LIGHT_TITLE_BAR_COLOR
+            _set_dwm_window_attribute(hwnd, dwmwa_caption_color, color_value)
             
             # 禁用标题栏过渡动画，使切换更即时
             dwmwa_transitions_forcedisabled = 3
-            disable_transitions = c_int(1)
-            windll.dwmapi.DwmSetWindowAttribute(
-                hwnd, dwmwa_transitions_forcedisabled,
-                byref(disable_transitions), sizeof(disable_transitions)
-            )
+            _set_dwm_window_attribute(hwnd, dwmwa_transitions_forcedisabled, 1)
         except (OSError, AttributeError):
             # 非Windows系统或API调用失败时忽略
             pass
@@ -2008,6 +2370,8 @@ class KochWindow(QWidget):
         """根据主题更新波形图颜色"""
         if self.plot_widget is None:
             return
+        import pyqtgraph as pg  # 波形图控件已创建，模块已加载
+        
         if self.is_dark_theme:
             bg_color = self.DARK_BACKGROUND_COLOR
             grid_alpha = 0.1
@@ -2033,13 +2397,16 @@ class KochWindow(QWidget):
         Args:
             checked: True为显示波形图，False为隐藏波形图
         """
+        if checked and self.plot_widget is None:
+            self._create_waveform_widget()
         self.is_waveform_enabled = checked
         if checked:
             self.update_waveform_theme()
             self.plot_widget.show()
             self.setFixedSize(self.WINDOW_WIDTH, self.WINDOW_HEIGHT_WAVE)
         else:
-            self.plot_widget.hide()
+            if self.plot_widget is not None:
+                self.plot_widget.hide()
             self.setFixedSize(self.WINDOW_WIDTH, self.WINDOW_HEIGHT)
             if self.waveform_timer is not None:
                 self.waveform_timer.stop()
@@ -2092,6 +2459,12 @@ class KochWindow(QWidget):
             event: 关闭事件对象
         """
         self.save_lesson_progress(self.current_lesson_name, self.current_text_index)
+        # 立即写入尚未同步的设置
+        self.settings_sync_timer.stop()
+        self.settings.sync()
+        # 等待后台音频处理结束，避免窗口销毁后仍发出信号
+        self.audio_pool.clear()
+        self.audio_pool.waitForDone()
         self.logger.info("Koch Application closed")
         super().closeEvent(event)
 
@@ -17,6 +17,11 @@ from collections import defaultdict
 
 from Config import config
 
+try:
+    import orjson  # 可选依赖：C 实现的 JSON 库，读写统计文件更快
+except ImportError:
+    orjson = None
+
 
 class StatisticsManager:
     """
@@ -41,7 +46,7 @@ class StatisticsManager:
         自动加载已有的统计数据，如果文件不存在则创建默认数据结构
         """
         self.logger = logging.getLogger("Koch")
-        self.stats_file = config.base_dir / "Statistics.json"
+        self.stats_file = config.get_statistics_file()
         self.data = self.load_statistics()
 
         self._lesson_cache = {}  # 课程数据缓存，按编号索引
@@ -58,8 +63,11 @@ class StatisticsManager:
         """
         if self.stats_file.exists():
             try:
-                with open(self.stats_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                if orjson is not None:
+                    data = orjson.loads(self.stats_file.read_bytes())
+                else:
+                    with open(self.stats_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
                 self.logger.info(f"Statistics information loaded from {self.stats_file}")
                 return data
             except Exception as e:
@@ -81,11 +89,14 @@ class StatisticsManager:
         """
         保存统计数据到JSON文件
         
-        使用缩进格式化输出，便于人工阅读
+        使用缩进格式化输出，便于人工阅读（安装了 orjson 时使用 orjson 序列化）
         """
         try:
-            with open(self.stats_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=4, ensure_ascii=False)
+            if orjson is not None:
+                self.stats_file.write_bytes(orjson.dumps(self.data, option=orjson.OPT_INDENT_2))
+            else:
+                with open(self.stats_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.data, f, indent=4, ensure_ascii=False)
             self.logger.debug(f"Statistics saved to {self.stats_file}")
         except Exception as e:
             self.logger.error(f"Failed to save statistics: {e}", exc_info=True)